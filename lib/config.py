@@ -5,8 +5,20 @@ Loads settings from config.json for runtime configuration without code changes.
 
 import ujson
 
+# Direction bits used by the compiled line filter
+DIRECTION_H = 0x01
+DIRECTION_R = 0x02
+DIRECTION_OTHER = 0x04  # Missing or unknown direction code
+DIRECTION_ANY = 0xFF  # Empty direction list in config.json
+
+_DIRECTION_BITS = {'H': DIRECTION_H, 'R': DIRECTION_R}
+
 _config = None
 
+# Compiled once in load_config(), treat as read-only
+_filter_index = None
+_diva_ids = None
+
 
 def load_config():
     """Load and cache configuration from config.json."""
@@ -17,24 +29,101 @@ def load_config():
                 _config = ujson.load(f)
         except OSError as err:
             raise RuntimeError('config.json not found. Please create it from config.json.example') from err
+        _compile_filters(_config)
     return _config
 
 
+def _compile_filters(config):
+    """Compile the configured stops into the filter index."""
+    global _filter_index, _diva_ids
+    _filter_index = compile_line_filters(config['stops'])
+    _diva_ids = tuple(_filter_index)
+
+
+def direction_bit(direction):
+    """Map an API direction code to its filter bit."""
+    return _DIRECTION_BITS.get(direction, DIRECTION_OTHER)
+
+
+def compile_line_filters(stops):
+    """
+    Compile stop/line/direction rules into a filter index.
+
+    Args:
+        stops: List of {"diva": ..., "lines": {line_name: [directions]}}
+
+    Returns:
+        {diva: {line_name: direction_mask}}
+    """
+    index = {}
+    for stop in stops:
+        lines = index.setdefault(stop['diva'], {})
+        for line_name, directions in stop['lines'].items():
+            mask = 0
+            for direction in directions:
+                mask |= direction_bit(direction)
+            lines[line_name] = lines.get(line_name, 0) | (mask or DIRECTION_ANY)
+    return index
+
+
 def get_stops():
     """Get list of stops with their line filters."""
     return load_config()['stops']
 
 
+def get_filter_index():
+    """
+    Get the compiled line filter as {diva: {line_name: direction_mask}}.
+    A line passes if mask & direction_bit(direction) is non-zero.
+    """
+    load_config()
+    return _filter_index
+
+
+def get_diva_ids():
+    """Get tuple of configured DIVA IDs (duplicates removed, config order)."""
+    load_config()
+    return _diva_ids
+
+
 def get_line_priority():
     """Get line priority order for display sorting."""
     return load_config()['line_priority']
 
 
+def get_layout_config():
+    """
+    Get the departure row layout with defaults: departures_per_row (time
+    slots drawn per row), spare_departures (kept beyond that so rows stay
+    full while countdowns are extrapolated) and min_countdown ({line_name:
+    minutes}, departures leaving sooner are dropped).
+    """
+    layout = {
+        'departures_per_row': 4,
+        'spare_departures': 1,
+        'min_countdown': {},
+    }
+    layout.update(load_config().get('layout', {}))
+    return layout
+
+
+def get_departure_budget():
+    """Get the number of departures kept per line (drawn plus spare)."""
+    layout = get_layout_config()
+    return layout['departures_per_row'] + layout['spare_departures']
+
+
 def get_update_interval():
     """Get data refresh interval in seconds."""
     return load_config()['update_interval_sec']
 
 
+def get_fetch_interval_limits():
+    """Get (floor, ceiling) in seconds for the adaptive fetch interval."""
+    config = load_config()
+    return config.get('fetch_interval_min_sec', 60), config.get('fetch_interval_max_sec', 900)
+
+
 def get_animation_interval():
     """Get animation toggle interval in seconds."""
     return load_config()['animation_interval_sec']
@@ -60,6 +149,77 @@ def get_stale_restart_threshold():
     return load_config()['stale_restart_threshold_sec']
 
 
+def get_max_stops_per_request():
+    """Get the maximum number of stops fetched in one API request."""
+    return load_config().get('max_stops_per_request', 5)
+
+
+def get_receive_buffer_size():
+    """Get the size in bytes of the HTTP receive buffer reserved at boot."""
+    return load_config().get('receive_buffer_bytes', 8192)
+
+
+def get_max_response_bytes():
+    """Get the largest accepted HTTP response body in bytes."""
+    return load_config().get('max_response_bytes', 262144)
+
+
+def get_heap_sample_interval():
+    """Get seconds between heap fragmentation samples (0 = only at boot)."""
+    return load_config().get('heap_sample_interval_sec', 1800)
+
+
+def get_dns_ttl():
+    """Get how long the API host's resolved address is cached in seconds."""
+    return load_config().get('dns_ttl_sec', 300)
+
+
+def get_gzip_enabled():
+    """
+    Get whether gzip-compressed API responses are requested: True, False
+    or 'auto' (only with a SPIRAM heap, see memory.large_heap()).
+    """
+    return load_config().get('gzip_responses', 'auto')
+
+
+def get_retry_config():
+    """Get (failure_threshold, open_sec, jitter) of the fetch circuit breaker."""
+    retry = load_config().get('retry', {})
+    return retry.get('failure_threshold', 3), retry.get('open_sec', 300), retry.get('jitter', 0.2)
+
+
+def get_snapshot_config():
+    """
+    Get (path, interval_sec, max_age_sec) of the last-good dataset on flash.
+    path is None if the snapshot is disabled.
+    """
+    snapshot = load_config().get('snapshot', {})
+    return (snapshot.get('path', 'last_good.bin'), snapshot.get('interval_sec', 600),
+            snapshot.get('max_age_sec', 7200))
+
+
+def get_log_config():
+    """Get the logging settings (level, RAM ring, flash file) with defaults."""
+    log_config = {
+        'level': 'info',
+        'ring_lines': 0,
+        'flash_path': None,
+        'flash_max_bytes': 16384,
+        'flash_backups': 1,
+        'flash_level': 'warning',
+    }
+    log_config.update(load_config().get('log', {}))
+    return log_config
+
+
+def get_proxy_url():
+    """Get the LAN proxy monitor URL, or None if the proxy is disabled."""
+    proxy = load_config().get('proxy', {})
+    if proxy.get('enabled'):
+        return proxy['url']
+    return None
+
+
 def get_destination_shortnames():
     """Get destination name abbreviations mapping."""
     return load_config().get('destination_shortnames', {})
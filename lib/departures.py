@@ -0,0 +1,233 @@
+"""
+Compact in-memory model for departure data.
+One slotted record per line/direction with countdowns packed in an array,
+instead of nested dicts per stop, line and departure.
+
+Each departure also keeps its absolute time on the local clock, so countdowns
+can be recomputed between fetches without network access.
+
+Stop, line and destination names are shared across fetches through an
+intern table (see InternTable).
+"""
+
+from array import array
+
+# Distinct strings kept by the shared intern table
+INTERN_CAPACITY = 128
+
+
+class LineDepartures:
+    """Upcoming departures of one line in one direction at one stop."""
+
+    __slots__ = ('stop', 'diva', 'name', 'direction', 'towards', 'countdowns', 'times')
+
+    def __init__(self, stop, diva, name, direction, towards, countdowns=None, times=None):
+        """
+        Args:
+            stop: Stop title
+            diva: Stop DIVA ID
+            name: Line name (e.g. "49", "U4")
+            direction: Direction code ("H" or "R")
+            towards: Destination as reported by the API
+            countdowns: array('h') of minutes until departure
+            times: array('l') of departure times in seconds, parallel to
+                countdowns (server clock while parsing, local clock after
+                anchor_departures())
+        """
+        self.stop = stop
+        self.diva = diva
+        self.name = name
+        self.direction = direction
+        self.towards = towards
+        self.countdowns = countdowns if countdowns is not None else array('h')
+        self.times = times if times is not None else array('l')
+
+    def __repr__(self):
+        return '<LineDepartures {} {} -> {}: {}>'.format(
+            self.name, self.direction, self.towards, list(self.countdowns))
+
+
+class InternTable:
+    """
+    Bounded table of shared strings that persists across fetches.
+
+    Repeated names map to the object stored first, so the records of every
+    fetch point to the same strings instead of keeping fresh copies. A
+    value derived from a string (the shortened destination) is stored
+    alongside it and computed once. When the table is full, the least
+    recently used string is evicted.
+    """
+
+    def __init__(self, capacity=INTERN_CAPACITY):
+        self.capacity = capacity
+        # value -> [shared string, derived value or None, last use]
+        self._entries = {}
+        self._clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, value):
+        self._clock += 1
+        entry = self._entries.get(value)
+        if entry is None:
+            self.misses += 1
+            if len(self._entries) >= self.capacity:
+                self._evict()
+            entry = [value, None, 0]
+            self._entries[value] = entry
+        else:
+            self.hits += 1
+        entry[2] = self._clock
+        return entry
+
+    def _evict(self):
+        oldest = None
+        oldest_use = 0
+        for value, entry in self._entries.items():
+            if oldest is None or entry[2] < oldest_use:
+                oldest = value
+                oldest_use = entry[2]
+        del self._entries[oldest]
+        self.evictions += 1
+
+    def intern(self, value):
+        """Return the shared instance of value, adding it if new."""
+        return self._entry(value)[0]
+
+    def derived(self, value, func):
+        """Return func(value), computed once while value stays in the table."""
+        entry = self._entry(value)
+        if entry[1] is None:
+            entry[1] = func(entry[0])
+        return entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return the table's size and hit/miss/eviction counters."""
+        return {
+            'strings': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+# Shared by the parser, the wire decoder and the display
+shared_strings = InternTable()
+
+
+def shorten_destination(towards, shortnames):
+    """
+    Shorten and normalize a destination name for display.
+
+    Args:
+        towards: Destination as reported by the API
+        shortnames: {upper-case name: abbreviation}
+    """
+    if not towards:
+        return ''
+
+    # Take first part before comma
+    towards = towards.split(',')[0].strip()
+
+    # Shorten known long names from config
+    upper = towards.upper()
+    if upper in shortnames:
+        towards = shortnames[upper]
+
+    # Replace German umlauts
+    towards = towards.replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
+    towards = towards.replace('Ä', 'Ae').replace('Ö', 'Oe').replace('Ü', 'Ue').replace('ß', 'ss')
+
+    return towards
+
+
+def anchor_departures(lines, server_time, now):
+    """
+    Move departure times from the server clock to the local clock.
+
+    Departures without a timestamp (time 0) are derived from their countdown,
+    placed in the middle of the reported minute.
+
+    Args:
+        lines: List of LineDepartures with times on the server clock
+        server_time: serverTime of the response in epoch seconds, or None
+            to trust the local clock
+        now: Local time (utime.time()) when the response was received
+    """
+    offset = now - server_time if server_time is not None else 0
+    for line in lines:
+        times = line.times
+        countdowns = line.countdowns
+        for i in range(len(times)):
+            if times[i]:
+                times[i] += offset
+            else:
+                times[i] = now + countdowns[i] * 60 + 30
+
+
+def trim_departures(line, limit=0, minimum=0):
+    """
+    Drop departures of a line that leave in less than minimum minutes,
+    then keep at most limit of the rest.
+
+    Args:
+        line: LineDepartures record, departures in time order
+        limit: Departures kept (0 = all)
+        minimum: Smallest countdown kept in minutes
+    """
+    countdowns = line.countdowns
+    keep = [i for i in range(len(countdowns)) if countdowns[i] >= minimum]
+    if limit:
+        keep = keep[:limit]
+    if len(keep) != len(countdowns):
+        line.countdowns = array('h', [countdowns[i] for i in keep])
+        line.times = array('l', [line.times[i] for i in keep])
+
+
+def refresh_countdowns(lines, now, min_countdowns=None):
+    """
+    Recompute countdowns from departure times.
+
+    Departures whose time has passed (or that leave sooner than the line's
+    minimum countdown) are dropped; lines without any remaining departure
+    are removed from the list.
+
+    Args:
+        lines: List of LineDepartures with times on the local clock
+        now: Current time on the local clock
+        min_countdowns: Optional {line_name: minutes}
+
+    Returns:
+        True if any displayed value changed.
+    """
+    changed = False
+    for line in lines:
+        times = line.times
+        countdowns = line.countdowns
+        earliest = now
+        if min_countdowns:
+            earliest += min_countdowns.get(line.name, 0) * 60
+        departed = 0
+        for i in range(len(times)):
+            remaining = times[i] - now
+            if times[i] < earliest:
+                departed += 1
+                continue
+            minutes = remaining // 60
+            if countdowns[i] != minutes:
+                countdowns[i] = minutes
+                changed = True
+
+        if departed:
+            keep = [i for i in range(len(times)) if times[i] >= earliest]
+            line.times = array('l', [times[i] for i in keep])
+            line.countdowns = array('h', [countdowns[i] for i in keep])
+            changed = True
+
+    if changed:
+        lines[:] = [line for line in lines if len(line.countdowns)]
+    return changed
@@ -5,10 +5,15 @@ Display module for CrowPanel 4.2" E-Paper (400x300)
 import utime
 import gc
 from lib.utils import two_digits
-from lib.ssd1683 import SSD1683
-from lib.fonts import draw_text_24, draw_text_16, FONT_24_HEIGHT, FONT_16_HEIGHT
+from lib.fonts import (
+    draw_text_24, draw_text_16, get_text_width_24, get_text_width_16, FONT_24_HEIGHT, FONT_16_HEIGHT
+)
 from lib.init_wifi import get_timezone_offset
-from lib.config import get_full_refresh_interval, get_line_priority, get_destination_shortnames
+from lib.config import (
+    get_full_refresh_interval, get_line_priority, get_destination_shortnames, get_layout_config
+)
+from lib.departures import refresh_countdowns, shared_strings, shorten_destination
+from lib import log
 
 DISPLAY_WIDTH = 400
 DISPLAY_HEIGHT = 300
@@ -35,6 +40,9 @@ LAST_ROW_TOP_OFFSET = 288
 BUILTIN_FONT_HEIGHT = 8
 BUILTIN_FONT_WIDTH = 8
 TIME_DISPLAY_WIDTH = 5 * BUILTIN_FONT_WIDTH + 8  # "HH:MM" = 5 chars + padding
+STALE_AREA_WIDTH = 200  # Centered area cleared for the stale indicator
+
+_log = log.get_logger('display')
 
 # Display instance
 epd = None
@@ -45,30 +53,187 @@ _refresh_count = 0
 # Animation state for arriving indicator
 _arriving_indicator_state = False  # False=bottom-left, True=top-right
 
+# (x, y) of the time slots showing the arriving indicator on screen
+_arriving_slots = []
+ARRIVING_SQUARE_SIZE = 8
+
 # Cached departure data for animation redraws
 _cached_departures = None
 
+# Departure row layout, read from config in init_display()
+_departures_per_row = 4
+_min_countdowns = {}
+
+# x of each time slot, and line name -> rank in line_priority
+_slot_x = ()
+_priority_rank = {}
+
+# Layout plan of _cached_departures, see _build_plan()
+_plan_rows = []
+_plan_separators = []
+_planned_data = None
+_planned_count = 0
+
+# The screen shows the rows of the current plan: a redraw of the same
+# dataset only repaints the time slots
+_plan_painted = False
+
 # Wi-Fi status state (for redrawing after display updates)
 _wifi_connected = False
 _wifi_stale_data = False
 
+# Fetches are suspended by the retry circuit breaker
+_circuit_open = False
 
-def init_display():
-    """Initialize the e-paper display"""
-    global epd, _refresh_count
-    epd = SSD1683()
-    epd.init()
+# Fingerprint of the departure screen currently shown, None after other screens
+_shown_fingerprint = None
+
+# Refresh counters for diagnostics
+_refreshes_performed = 0
+_refreshes_skipped = 0
+
+# Keeps fingerprints in MicroPython's small int range
+_FINGERPRINT_MASK = 0x3FFFFFFF
+
+# Rectangles (x, y, w, h) drawn since the last refresh, None = whole screen.
+# _fill_rect() and the _text helpers mark what they draw.
+_dirty_rects = None
+
+# SPI bytes sent to the panel
+_bytes_last_refresh = 0
+_bytes_sent = 0
+
+
+def _mark_dirty(x, y, w, h):
+    """Record a drawn rectangle, merged with the ones it overlaps."""
+    global _dirty_rects
+    if _dirty_rects is None:
+        return
+    rects = _dirty_rects
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            rx, ry, rw, rh = rects[i]
+            if x <= rx + rw and rx <= x + w and y <= ry + rh and ry <= y + h:
+                x2 = max(x + w, rx + rw)
+                y2 = max(y + h, ry + rh)
+                x = min(x, rx)
+                y = min(y, ry)
+                w = x2 - x
+                h = y2 - y
+                rects.pop(i)
+                merged = True
+                break
+    rects.append((x, y, w, h))
+
+
+def _fill_rect(x, y, w, h, color):
+    """fill_rect() that marks the area for the next partial refresh."""
+    epd.fill_rect(x, y, w, h, color)
+    _mark_dirty(x, y, w, h)
+
+
+def _text(text, x, y):
+    """Built-in 8px font text that marks its area."""
+    epd.text(text, x, y, COLOR_BLACK)
+    _mark_dirty(x, y, len(text) * BUILTIN_FONT_WIDTH, BUILTIN_FONT_HEIGHT)
+
+
+def _text_16(text, x, y):
+    """16px font text that marks its area."""
+    draw_text_16(epd, x, y, text, COLOR_BLACK)
+    _mark_dirty(x, y, get_text_width_16(text), FONT_16_HEIGHT)
+
+
+def _text_24(text, x, y):
+    """24px font text that marks its area."""
+    draw_text_24(epd, x, y, text, COLOR_BLACK)
+    _mark_dirty(x, y, get_text_width_24(text), FONT_24_HEIGHT)
+
+
+def _clear_screen():
+    """Clear the framebuffer; the next refresh sends the whole screen."""
+    global _dirty_rects, _plan_painted
     epd.fill(COLOR_WHITE)
+    _dirty_rects = None
+    _plan_painted = False
+    del _arriving_slots[:]
+
+
+def _draw_arriving_square(time_x, times_y):
+    """Draw the arriving indicator of a time slot (alternates bottom-left / top-right)."""
+    size = ARRIVING_SQUARE_SIZE
+    if _arriving_indicator_state:
+        # Top-right position (8px offset on x axis)
+        _fill_rect(time_x + 8, times_y, size, size, COLOR_BLACK)
+    else:
+        # Bottom-left position
+        _fill_rect(time_x, times_y + FONT_16_HEIGHT - size, size, size, COLOR_BLACK)
+
+
+def _show(full=False):
+    """
+    Push the framebuffer to the panel (full or partial refresh). A partial
+    refresh only sends the rectangles drawn since the last refresh.
+    """
+    global _refreshes_performed, _dirty_rects, _bytes_last_refresh, _bytes_sent
+    _refreshes_performed += 1
+    if full:
+        epd.show()
+    else:
+        # Nothing marked means an unknown change: send everything
+        epd.show_partial(_dirty_rects or None)
+    _dirty_rects = []
+    _bytes_last_refresh = epd.bytes_sent
+    _bytes_sent += epd.bytes_sent
+    _log.debug('refresh: {}, {} bytes sent', 'full' if full else 'partial', epd.bytes_sent)
+
+
+def get_refresh_stats():
+    """Return counters of performed and skipped display refreshes and SPI bytes sent."""
+    return {
+        'refreshes_performed': _refreshes_performed,
+        'refreshes_skipped': _refreshes_skipped,
+        'bytes_last_refresh': _bytes_last_refresh,
+        'bytes_sent': _bytes_sent,
+    }
+
+
+def init_display(panel=None):
+    """
+    Initialize the e-paper display.
+
+    Args:
+        panel: Display driver to draw on (host benchmarks), defaults to
+            the SSD1683
+    """
+    global epd, _refresh_count, _shown_fingerprint, _departures_per_row, _min_countdowns
+    global _slot_x, _priority_rank
+    layout = get_layout_config()
+    _departures_per_row = layout['departures_per_row']
+    _min_countdowns = layout['min_countdown']
+    _slot_x = tuple(TIMES_COLUMN_X + i * TIME_SLOT_WIDTH for i in range(_departures_per_row))
+    _priority_rank = {name: i for i, name in enumerate(get_line_priority())}
+
+    if panel is None:
+        # Imported here so the layout code runs on hosts without the hardware
+        from lib.ssd1683 import SSD1683
+        panel = SSD1683()
+    epd = panel
+    epd.init()
+    _clear_screen()
     # Single full refresh on startup to ensure clean slate
-    epd.show()
+    _show(full=True)
     _refresh_count = 0
+    _shown_fingerprint = None
 
 
 def _draw_centered_text(text, y):
     """Draw text horizontally centered on the display."""
     text_width = len(text) * BUILTIN_FONT_WIDTH
     x = (DISPLAY_WIDTH - text_width) // 2
-    epd.text(text, x, y, COLOR_BLACK)
+    _text(text, x, y)
 
 
 def _draw_boot_frame():
@@ -90,8 +255,8 @@ def _draw_boot_frame():
 
 def write_start_msg_to_display(msg="Booting"):
     """Show startup message with centered layout - uses partial refresh to reduce flashing"""
-    global epd
-    epd.fill(COLOR_WHITE)
+    global epd, _shown_fingerprint
+    _clear_screen()
 
     _draw_boot_frame()
 
@@ -108,13 +273,14 @@ def write_start_msg_to_display(msg="Booting"):
     # Footer
     _draw_centered_text("Vienna Public Transport", DISPLAY_HEIGHT - 70)
 
-    epd.show_partial()
+    _show()
+    _shown_fingerprint = None
 
 
 def write_error_to_display(msg="Unknown reason"):
     """Show error message with centered layout - uses full refresh to ensure visibility"""
-    global epd, _refresh_count
-    epd.fill(COLOR_WHITE)
+    global epd, _refresh_count, _shown_fingerprint
+    _clear_screen()
 
     _draw_boot_frame()
 
@@ -131,8 +297,9 @@ def write_error_to_display(msg="Unknown reason"):
     _draw_centered_text("Check connection and", 180)
     _draw_centered_text("restart device", 200)
 
-    epd.show()  # Full refresh for errors to clear any ghosting
+    _show(full=True)  # Full refresh for errors to clear any ghosting
     _refresh_count = 0
+    _shown_fingerprint = None
 
 
 def write_fetching_sign_to_display():
@@ -144,25 +311,16 @@ def write_fetching_sign_to_display():
     pass
 
 
-def _shorten_destination(towards):
-    """Shorten and normalize destination names for display."""
-    if not towards:
-        return ''
-
-    # Take first part before comma
-    towards = towards.split(',')[0].strip()
-
-    # Shorten known long names from config
-    shortnames = get_destination_shortnames()
-    upper = towards.upper()
-    if upper in shortnames:
-        towards = shortnames[upper]
+def _shorten(towards):
+    return shorten_destination(towards, get_destination_shortnames())
 
-    # Replace German umlauts
-    towards = towards.replace('ä', 'ae').replace('ö', 'oe').replace('ü', 'ue')
-    towards = towards.replace('Ä', 'Ae').replace('Ö', 'Oe').replace('Ü', 'Ue').replace('ß', 'ss')
 
-    return towards
+def _shorten_destination(towards):
+    """
+    Shorten and normalize destination names for display. The result is
+    kept next to the interned name, so each destination is shortened once.
+    """
+    return shared_strings.derived(towards, _shorten)
 
 
 def _draw_separator_line(y):
@@ -170,114 +328,134 @@ def _draw_separator_line(y):
     epd.hline(TEXT_LEFT_OFFSET, y, DISPLAY_WIDTH - 2 * TEXT_LEFT_OFFSET, COLOR_BLACK)
 
 
-def write_to_display(data):
-    """Render departure data to display with grouped layout by line."""
-    global epd, _refresh_count, _cached_departures
-
-    print('write_to_display: starting render, animation_state={}'.format(_arriving_indicator_state))
+def _visible_countdowns(line):
+    """
+    Return the countdowns of a row that are drawn. Minimum countdowns are
+    applied when the data is parsed and extrapolated, only the spare
+    departures are cut here.
+    """
+    return line.countdowns[:_departures_per_row]
 
-    # Cache the data for animation redraws
-    _cached_departures = data
 
-    epd.fill(COLOR_WHITE)
+def _sort_key(line):
+    """Priority (preferred lines first), then direction (R before H), then name."""
+    return (_priority_rank.get(line.name, 999), line.direction != 'R', line.name)
 
-    # Extract all lines from all stops
-    lines = [line for stop in data for line in stop['lines']]
-
-    # Sort by priority (preferred lines first), then by direction (R before H)
-    priority_order = get_line_priority()
-    lines = sorted(
-        lines,
-        key=lambda line: (
-            line['name'] not in priority_order,
-            priority_order.index(line['name']) if line['name'] in priority_order else 999,
-            line.get('direction', '') != 'R',  # R comes first
-            line['name']
-        )
-    )
-
-    # Group lines by name
-    grouped = {}
-    for line in lines:
-        name = line['name']
-        if name not in grouped:
-            grouped[name] = []
-        grouped[name].append(line)
-
-    # Maintain priority order for groups
-    group_order = []
-    seen = set()
-    for line in lines:
-        if line['name'] not in seen:
-            group_order.append(line['name'])
-            seen.add(line['name'])
 
-    # Render grouped layout
-    current_y = TOP_OFFSET
+def _build_plan(data):
+    """
+    Lay out a dataset once: sort and group the lines and compute every
+    row's positions and destination text. Redraws of the same dataset
+    (extrapolated countdowns, animation, status) paint from this plan.
 
-    for group_idx, line_name in enumerate(group_order):
-        group_lines = grouped[line_name]
+    Sets _plan_rows to tuples (line, line name or None on sub rows, name y,
+    destination, destination y, times y) in display order and
+    _plan_separators to the y of each group separator.
+    """
+    global _plan_rows, _plan_separators, _planned_data, _planned_count, _plan_painted
 
-        # Draw separator line before group (except first)
-        if group_idx > 0:
+    # Group lines by name, groups in order of their first line
+    groups = {}
+    group_order = []
+    for line in sorted(data, key=_sort_key):
+        group = groups.get(line.name)
+        if group is None:
+            group = groups[line.name] = []
+            group_order.append(group)
+        group.append(line)
+
+    rows = []
+    separators = []
+    current_y = TOP_OFFSET
+    for group in group_order:
+        # Separator line before each group except the first
+        if rows:
             current_y += GROUP_SEPARATOR_PADDING
-            _draw_separator_line(current_y)
+            separators.append(current_y)
             current_y += GROUP_SEPARATOR_PADDING + 1  # +1 for line thickness
 
-        for row_idx, line in enumerate(group_lines):
-            departures = line['departures']
+        for row_idx, line in enumerate(group):
+            is_first_row = row_idx == 0
+            row_height = GROUP_FIRST_ROW_HEIGHT if is_first_row else GROUP_SUB_ROW_HEIGHT
+            rows.append((
+                line,
+                line.name if is_first_row else None,
+                current_y + (row_height - FONT_24_HEIGHT) // 2,
+                _shorten_destination(line.towards),
+                current_y + (row_height - BUILTIN_FONT_HEIGHT) // 2,
+                current_y + (row_height - FONT_16_HEIGHT) // 2,
+            ))
+            current_y += row_height
 
-            # Filter U4 departures (need at least 6 min to reach station)
-            if line_name == 'U4':
-                departures = [d for d in departures if d['countdown'] >= 6]
+    _plan_rows = rows
+    _plan_separators = separators
+    _planned_data = data
+    _planned_count = len(data)
+    _plan_painted = False
 
-            is_first_row = (row_idx == 0)
-            row_height = GROUP_FIRST_ROW_HEIGHT if is_first_row else GROUP_SUB_ROW_HEIGHT
 
-            # Draw line name only on first row of group
-            if is_first_row:
-                name_y = current_y + (row_height - FONT_24_HEIGHT) // 2
-                draw_text_24(epd, TEXT_LEFT_OFFSET, name_y, line_name, COLOR_BLACK)
+def _plan_for(data):
+    """Build the plan unless it is already the plan of this dataset."""
+    # Extrapolation only removes lines, so an unchanged count means the same rows
+    if data is not _planned_data or len(data) != _planned_count:
+        _build_plan(data)
 
-            # Draw destination
-            towards = _shorten_destination(line.get('towards', ''))
-            dest_y = current_y + (row_height - BUILTIN_FONT_HEIGHT) // 2
-            epd.text(towards, DESTINATION_X, dest_y, COLOR_BLACK)
-
-            # Draw departure times in fixed columns
-            times_y = current_y + (row_height - FONT_16_HEIGHT) // 2
-            for i, dep in enumerate(departures[:4]):  # Max 4 times
-                countdown = dep['countdown']
-
-                # Calculate x position for this time slot
-                time_x = TIMES_COLUMN_X + i * TIME_SLOT_WIDTH
-
-                if countdown == 0:
-                    # Animated square for arriving (alternates bottom-left / top-right)
-                    square_size = 8  # 8x8 square
-                    if _arriving_indicator_state:
-                        # Top-right position (8px offset on x axis)
-                        epd.fill_rect(time_x + 8, times_y, square_size, square_size, COLOR_BLACK)
-                    else:
-                        # Bottom-left position
-                        epd.fill_rect(time_x, times_y + FONT_16_HEIGHT - square_size, square_size, square_size, COLOR_BLACK)
-                else:
-                    time_str = str(countdown) + "'"
-                    # Right-align within slot: pad single digits
-                    if countdown < 10:
-                        time_x += 12  # Offset for single digit
-                    draw_text_16(epd, time_x, times_y, time_str, COLOR_BLACK)
 
-            current_y += row_height
+def _display_fingerprint(minute):
+    """
+    Hash everything the departure screen shows: line names, destinations,
+    visible countdowns, the clock minute and the status indicators.
 
-    # Store the update time for stale indicator
-    global _last_update_time
-    _last_update_time = utime.time()
+    Args:
+        minute: Minute shown by the clock
+    """
+    h = hash((minute, _arriving_indicator_state, _wifi_connected, _wifi_stale_data, _circuit_open))
+    if _wifi_stale_data:
+        # The stale indicator shows the data age in seconds
+        h = hash((h, utime.time()))
+    for row in _plan_rows:
+        line = row[0]
+        h = (h * 31 + hash(line.name)) & _FINGERPRINT_MASK
+        h = (h * 31 + hash(line.towards)) & _FINGERPRINT_MASK
+        for countdown in _visible_countdowns(line):
+            h = (h * 31 + countdown + 1) & _FINGERPRINT_MASK
+        h = (h * 31) & _FINGERPRINT_MASK  # Row separator
+    return h
+
+
+def _update_shown_fingerprint():
+    """Re-derive the shown fingerprint after a partial redraw of the status row."""
+    global _shown_fingerprint
+    if _shown_fingerprint is not None and _cached_departures is not None:
+        _shown_fingerprint = _display_fingerprint(_last_displayed_minute)
+
+
+def _draw_times(line, times_y):
+    """Draw the departure times of a row in fixed columns."""
+    for i, countdown in enumerate(_visible_countdowns(line)):
+        time_x = _slot_x[i]
+        if countdown == 0:
+            # Animated square for arriving, remembered for the animation
+            _draw_arriving_square(time_x, times_y)
+            _arriving_slots.append((time_x, times_y))
+        else:
+            time_str = str(countdown) + "'"
+            # Right-align within slot: pad single digits
+            if countdown < 10:
+                time_x += 12  # Offset for single digit
+            _text_16(time_str, time_x, times_y)
+
+
+def _draw_status_row(local_time):
+    """Redraw the bottom row: clock (left), stale indicator (center), Wi-Fi status (right)."""
+    global _last_displayed_minute
+    _fill_rect(TEXT_LEFT_OFFSET, LAST_ROW_TOP_OFFSET, DISPLAY_WIDTH - 2 * TEXT_LEFT_OFFSET,
+               BUILTIN_FONT_HEIGHT + 2, COLOR_WHITE)
 
     # Draw current time (bottom left)
-    local_time = utime.localtime(utime.time() + get_timezone_offset())
     current_time_text = '{}:{}'.format(two_digits(local_time[3]), two_digits(local_time[4]))
-    epd.text(current_time_text, TEXT_LEFT_OFFSET, LAST_ROW_TOP_OFFSET, COLOR_BLACK)
+    _text(current_time_text, TEXT_LEFT_OFFSET, LAST_ROW_TOP_OFFSET)
+    _last_displayed_minute = local_time[4]
 
     # Draw stale indicator (center) if data is stale
     _draw_stale_indicator()
@@ -285,16 +463,82 @@ def write_to_display(data):
     # Draw Wi-Fi status (bottom right) - uses cached state
     _draw_wifi_status_internal()
 
+
+def write_to_display(data, updated_at=None):
+    """
+    Render departure data to display with grouped layout by line.
+
+    Nothing is drawn or refreshed if the visible content is identical to
+    what the panel already shows.
+
+    Args:
+        data: List of LineDepartures records
+        updated_at: When the data was fetched (utime.time()), for the stale
+            indicator; defaults to now
+    """
+    global epd, _refresh_count, _cached_departures, _shown_fingerprint, _refreshes_skipped
+    global _last_update_time, _plan_painted
+
+    # Redraws of cached data (animation, extrapolated countdowns) keep the stale age
+    is_new_data = data is not _cached_departures
+
+    # Cache the data for animation redraws
+    _cached_departures = data
+
+    # Store the update time for stale indicator
+    if is_new_data:
+        _last_update_time = updated_at if updated_at is not None else utime.time()
+
+    _plan_for(data)
+
+    local_time = utime.localtime(utime.time() + get_timezone_offset())
+    fingerprint = _display_fingerprint(local_time[4])
+    if fingerprint == _shown_fingerprint:
+        _refreshes_skipped += 1
+        _log.debug('write_to_display: nothing visible changed, skipping refresh (skipped={})',
+                   _refreshes_skipped)
+        return
+
+    if _plan_painted:
+        # Same rows on screen: only the time slots and the status row change
+        _log.debug('write_to_display: repainting times, animation_state={}', _arriving_indicator_state)
+        del _arriving_slots[:]
+        band_width = _departures_per_row * TIME_SLOT_WIDTH
+        for row in _plan_rows:
+            _fill_rect(TIMES_COLUMN_X, row[5], band_width, FONT_16_HEIGHT, COLOR_WHITE)
+            _draw_times(row[0], row[5])
+    else:
+        _log.debug('write_to_display: starting render, animation_state={}', _arriving_indicator_state)
+
+        _clear_screen()
+
+        for y in _plan_separators:
+            _draw_separator_line(y)
+
+        for line, line_name, name_y, towards, dest_y, times_y in _plan_rows:
+            # Draw line name only on first row of group
+            if line_name is not None:
+                _text_24(line_name, TEXT_LEFT_OFFSET, name_y)
+
+            # Draw destination
+            _text(towards, DESTINATION_X, dest_y)
+
+            _draw_times(line, times_y)
+        _plan_painted = True
+
+    _draw_status_row(local_time)
+
     # Refresh display - use partial refresh normally, full refresh periodically
     _refresh_count += 1
     full_refresh_interval = get_full_refresh_interval()
     if _refresh_count >= full_refresh_interval:
-        print('write_to_display: full refresh (count={})'.format(_refresh_count))
-        epd.show()  # Full refresh to clear ghosting
+        _log.info('write_to_display: full refresh (count={})', _refresh_count)
+        _show(full=True)  # Full refresh to clear ghosting
         _refresh_count = 0
     else:
-        print('write_to_display: partial refresh (count={})'.format(_refresh_count))
-        epd.show_partial()
+        _log.debug('write_to_display: partial refresh (count={})', _refresh_count)
+        _show()
+    _shown_fingerprint = fingerprint
 
     # Free memory after display refresh to help with TLS allocation
     gc.collect()
@@ -302,8 +546,13 @@ def write_to_display(data):
 
 def clear_cached_departures():
     """Clear cached departure data to free memory."""
-    global _cached_departures
+    global _cached_departures, _plan_rows, _planned_data, _plan_painted
     _cached_departures = None
+    _plan_rows = []
+    _planned_data = None
+    _plan_painted = False
+    # The arriving squares belong to the cleared dataset
+    del _arriving_slots[:]
     gc.collect()
 
 
@@ -320,20 +569,22 @@ def _draw_stale_indicator():
     # Calculate seconds since last update
     seconds_ago = utime.time() - _last_update_time if _last_update_time > 0 else 0
 
-    # Build the text: "STALE Xs" where X is seconds
-    stale_text = 'STALE {}s'.format(seconds_ago) if _wifi_stale_data else ''
-
-    # Calculate total width: triangle (12px) + gap (2px) + text
-    text_width = len(stale_text) * BUILTIN_FONT_WIDTH if stale_text else 0
-    indicator_width = 14 + text_width if _wifi_stale_data else 100  # Clear area
-
     # Clear center area
-    clear_x = center_x - indicator_width // 2
-    epd.fill_rect(clear_x, y, indicator_width, BUILTIN_FONT_HEIGHT + 2, COLOR_WHITE)
+    clear_x = center_x - STALE_AREA_WIDTH // 2
+    _fill_rect(clear_x, y, STALE_AREA_WIDTH, BUILTIN_FONT_HEIGHT + 2, COLOR_WHITE)
 
     if not _wifi_stale_data:
         return
 
+    # Build the text: "STALE Xs" where X is seconds, "OFFLINE Xs" while
+    # the circuit breaker holds fetches back
+    label = 'OFFLINE' if _circuit_open else 'STALE'
+    # Age unknown while the clock is behind the data (restored before NTP sync)
+    stale_text = '{} {}s'.format(label, seconds_ago) if seconds_ago >= 0 else label
+
+    # Calculate total width: triangle (12px) + gap (2px) + text
+    indicator_width = 14 + len(stale_text) * BUILTIN_FONT_WIDTH
+
     # Position for warning triangle
     tri_x = center_x - indicator_width // 2
     tri_y = y
@@ -350,7 +601,7 @@ def _draw_stale_indicator():
 
     # "STALE Xs" text after triangle
     text_x = tri_x + 14
-    epd.text(stale_text, text_x, tri_y, COLOR_BLACK)
+    _text(stale_text, text_x, tri_y)
 
 
 def _draw_wifi_status_internal():
@@ -363,7 +614,7 @@ def _draw_wifi_status_internal():
     y = LAST_ROW_TOP_OFFSET
 
     # Clear the status area first
-    epd.fill_rect(x, y, 22, 12, COLOR_WHITE)
+    _fill_rect(x, y, 22, 12, COLOR_WHITE)
 
     if _wifi_connected:
         # Draw signal bars (3 bars of increasing height)
@@ -371,65 +622,66 @@ def _draw_wifi_status_internal():
             bar_height = 4 + i * 3  # Heights: 4, 7, 10
             bar_x = x + i * 6
             bar_y = y + 8 - bar_height
-            epd.fill_rect(bar_x, bar_y, 4, bar_height, COLOR_BLACK)
+            _fill_rect(bar_x, bar_y, 4, bar_height, COLOR_BLACK)
     else:
         # Draw X for disconnected
-        epd.text('X', x + 4, y, COLOR_BLACK)
+        _text('X', x + 4, y)
 
 
-def draw_wifi_status(connected, stale_data=False):
+def draw_wifi_status(connected, stale_data=False, circuit_open=False):
     """
     Update Wi-Fi status state and draw indicator in bottom-right corner.
 
     Args:
         connected: True if Wi-Fi is connected
         stale_data: True if displaying stale/cached data (stored for stale indicator)
+        circuit_open: True while the retry circuit breaker suspends fetches
     """
-    global _wifi_connected, _wifi_stale_data
+    global _wifi_connected, _wifi_stale_data, _circuit_open, _refreshes_skipped
+
+    if connected == _wifi_connected and stale_data == _wifi_stale_data and circuit_open == _circuit_open:
+        _refreshes_skipped += 1
+        return
 
     # Store state for redraws
     _wifi_connected = connected
     _wifi_stale_data = stale_data
+    _circuit_open = circuit_open
 
-    # Draw the indicator
+    # Draw the indicators
+    _draw_stale_indicator()
     _draw_wifi_status_internal()
 
     # Partial refresh to show status update
-    epd.show_partial()
-
-
-def _has_arriving_departures(data):
-    """Check if there are any departures with countdown == 0."""
-    if data is None:
-        return False
-    for stop in data:
-        for line in stop.get('lines', []):
-            for dep in line.get('departures', [])[:4]:  # Only check first 4 (displayed)
-                if dep.get('countdown', -1) == 0:
-                    return True
-    return False
+    _show()
+    _update_shown_fingerprint()
 
 
 def update_arriving_animation():
-    """Toggle animation state and redraw display from cached data."""
-    global _arriving_indicator_state, _cached_departures
+    """
+    Toggle the arriving indicators in place: only the remembered time slots
+    are repainted and sent. Does not count toward the full refresh interval.
+    """
+    global _arriving_indicator_state
 
     # Skip animation if no departures are arriving
-    if not _has_arriving_departures(_cached_departures):
-        print('update_arriving_animation: no arriving departures, skipping')
+    if not _arriving_slots:
+        _log.debug('update_arriving_animation: no arriving departures, skipping')
         return False
 
     # Toggle the animation state
     old_state = _arriving_indicator_state
     _arriving_indicator_state = not _arriving_indicator_state
-    print('update_arriving_animation: toggled {} -> {}'.format(old_state, _arriving_indicator_state))
-
-    # Redraw from cached data if available
-    if _cached_departures is not None:
-        write_to_display(_cached_departures)
-        return True
-    print('update_arriving_animation: no cached data, skipping redraw')
-    return False
+    _log.debug('update_arriving_animation: toggled {} -> {}', old_state, _arriving_indicator_state)
+
+    size = ARRIVING_SQUARE_SIZE
+    for time_x, times_y in _arriving_slots:
+        # Both square positions of the slot
+        _fill_rect(time_x, times_y, 8 + size, FONT_16_HEIGHT, COLOR_WHITE)
+        _draw_arriving_square(time_x, times_y)
+    _show()
+    _update_shown_fingerprint()
+    return True
 
 
 # Track last displayed minute to avoid unnecessary updates
@@ -440,31 +692,31 @@ _last_update_time = 0
 
 
 def update_current_time():
-    """Update current time display and stale indicator. Returns True if display was updated."""
+    """
+    Update current time display and stale indicator once per minute.
+    Countdowns are extrapolated from the cached departure times at the same
+    tick; if any changed, the whole screen is redrawn.
+    Returns True if display was updated.
+    """
     global epd, _last_displayed_minute
 
-    local_time = utime.localtime(utime.time() + get_timezone_offset())
+    now = utime.time()
+    local_time = utime.localtime(now + get_timezone_offset())
     current_minute = local_time[4]
 
     # Check if minute changed
     if current_minute == _last_displayed_minute:
         return False
 
-    # Clear the bottom row
-    epd.fill_rect(TEXT_LEFT_OFFSET, LAST_ROW_TOP_OFFSET, DISPLAY_WIDTH - 2 * TEXT_LEFT_OFFSET, BUILTIN_FONT_HEIGHT + 2, COLOR_WHITE)
-
-    # Draw current time (bottom left)
-    current_time_text = '{}:{}'.format(two_digits(local_time[3]), two_digits(local_time[4]))
-    epd.text(current_time_text, TEXT_LEFT_OFFSET, LAST_ROW_TOP_OFFSET, COLOR_BLACK)
-
-    # Draw stale indicator (center) if data is stale
-    _draw_stale_indicator()
-
-    # Redraw Wi-Fi status (bottom right) - was cleared with the row
-    _draw_wifi_status_internal()
+    # Extrapolate countdowns without network access
+    if _cached_departures is not None and refresh_countdowns(_cached_departures, now, _min_countdowns):
+        _log.debug('update_current_time: countdowns changed, redrawing')
+        write_to_display(_cached_departures)
+        return True
 
-    _last_displayed_minute = current_minute
+    _draw_status_row(local_time)
 
     # Partial refresh for the update
-    epd.show_partial()
+    _show()
+    _update_shown_fingerprint()
     return True
@@ -1,26 +1,121 @@
-import requests
+import utime
+from array import array
 from gc import collect
-from lib.config import get_stops
+from lib.config import (
+    get_diva_ids, get_filter_index, get_proxy_url, get_stops, get_max_stops_per_request,
+    get_receive_buffer_size, get_max_response_bytes, get_dns_ttl, get_gzip_enabled, direction_bit,
+    get_departure_budget, get_layout_config
+)
+from lib.departures import LineDepartures, anchor_departures, shared_strings, trim_departures
+from lib.http_client import HTTPConnection, Resolver, content_stream, split_url
+from lib.http_client import reserve_buffers as reserve_client_buffers
+from lib.json_stream import JsonStream
+from lib.metrics import elapsed_us, fetch_samples
+from lib.parse_datetime import parse_iso_timestamp
+from lib.urlencode import url_encode
+from lib import log, memory, wire
 
 # Wiener Linien Open Government Data API
 API_BASE_URL = 'https://www.wienerlinien.at/ogd_realtime/monitor'
 
+# Socket timeout for API requests
+HTTP_TIMEOUT_SEC = 5
 
-def get_diva_ids():
-    """Get list of DIVA IDs from configuration."""
-    return [stop['diva'] for stop in get_stops()]
+# Longest request URL; larger stop lists are split into several requests
+MAX_URL_LENGTH = 512
 
+# Keep-alive connection to the API host, reused across fetch cycles
+_connection = None
 
-def get_line_filters():
-    """Get line filters from configuration as {diva: {line_name: [directions]}}."""
-    return {stop['diva']: stop['lines'] for stop in get_stops()}
+# API URLs for the configured stops, built on first use
+_api_urls = None
 
+# Last valid lines per batch, kept when a later request for that batch fails
+_last_good_batches = {}
 
-def build_api_url():
-    """Build the Wiener Linien API URL with diva parameters."""
-    diva_ids = get_diva_ids()
-    params = '&'.join('diva=' + diva for diva in diva_ids)
-    return API_BASE_URL + '?' + params
+# Receive buffer reserved at boot and reused by every request
+RECEIVE_BUFFER = 'receive'
+
+_log = log.get_logger('get_data')
+
+# Returned by _read_line() for lines that do not have the expected structure
+_MALFORMED = object()
+
+
+def reserve_buffers():
+    """
+    Reserve the buffers of the fetch path (receive buffer, HTTP client
+    scratch). Call early at boot, while the heap still has large contiguous
+    blocks; every request reuses them.
+    """
+    memory.reserve(RECEIVE_BUFFER, get_receive_buffer_size())
+    reserve_client_buffers()
+
+
+def _stop_params(diva, use_proxy):
+    """Query parameters requesting one stop."""
+    params = ['diva=' + diva]
+    if use_proxy:
+        for stop in get_stops():
+            if stop['diva'] != diva:
+                continue
+            for line_name, directions in stop['lines'].items():
+                params.append('line={}/{}/{}'.format(
+                    diva, url_encode(line_name), ''.join(directions)))
+    return params
+
+
+def build_api_urls():
+    """
+    Build the monitor URLs for the configured stops (once, then cached).
+
+    Stops are split into batches of at most max_stops_per_request stops and
+    MAX_URL_LENGTH characters, so each response fits in RAM on its own.
+
+    When the LAN proxy is enabled, the requests go to the proxy instead and
+    also carry the line filters as line=DIVA/LINE/DIRECTIONS parameters,
+    so the proxy can return only the lines this display shows.
+    """
+    global _api_urls
+    if _api_urls is None:
+        base_url = get_proxy_url()
+        use_proxy = base_url is not None
+        if not use_proxy:
+            base_url = API_BASE_URL
+        max_stops = get_max_stops_per_request()
+
+        urls = []
+        batch = []
+        batch_stops = 0
+        for diva in get_diva_ids():
+            params = _stop_params(diva, use_proxy)
+            length = len(base_url) + 1 + sum(len(p) + 1 for p in batch + params)
+            if batch and (batch_stops >= max_stops or length > MAX_URL_LENGTH):
+                urls.append(base_url + '?' + '&'.join(batch))
+                batch = []
+                batch_stops = 0
+            batch.extend(params)
+            batch_stops += 1
+        if batch:
+            urls.append(base_url + '?' + '&'.join(batch))
+        _api_urls = urls
+    return _api_urls
+
+
+def get_connection():
+    """Return the persistent API connection, creating it on first use."""
+    global _connection
+    if _connection is None:
+        use_tls, host, port, _ = split_url(build_api_urls()[0])
+        _connection = HTTPConnection(host, port, use_tls, timeout=HTTP_TIMEOUT_SEC,
+                                     resolver=Resolver(get_dns_ttl()))
+    return _connection
+
+
+def close_connection():
+    """Close the keep-alive socket, e.g. after the Wi-Fi interface was cycled."""
+    if _connection is not None:
+        _connection.close()
 
 
 def parse_server_time(server_time):
@@ -48,15 +143,33 @@ def parse_server_time(server_time):
 
         return date_part + ' ' + time_clean
     except Exception as e:
-        print('Error parsing server_time:', e)
+        _log.warning('Error parsing server_time: {}', e)
         return ''
 
 
-def transform_response(api_response):
+def transform_response(stream, line_filters=None, buffer=None, departure_limit=None,
+                       min_countdowns=None, received_at=None):
     """
-    Transform Wiener Linien API response to simplified format.
-
-    Input structure:
+    Stream-parse a Wiener Linien API response and keep only configured lines.
+
+    The response is read from the stream in fixed-size chunks. Monitors, lines
+    and departures that do not match the DIVA/line/direction filters are
+    skipped without being materialized, so peak heap use does not depend on
+    how many lines a stop has.
+
+    Args:
+        stream: Response body providing readinto()
+        line_filters: Compiled filter index (see config.compile_line_filters),
+            defaults to the configured stops
+        buffer: Optional preallocated buffer for the parser's reads
+        departure_limit: Departures kept per line (0 = all), defaults to
+            the layout's departure budget
+        min_countdowns: {line_name: minutes}, departures leaving sooner are
+            dropped, defaults to the layout's min_countdown
+        received_at: Local time (utime.time()) the response was received,
+            defaults to now; departure times are anchored to it
+
+    Input structure (only the parts that are read):
     {
         "data": {
             "monitors": [{
@@ -67,7 +180,11 @@ def transform_response(api_response):
                     "direction": "R",
                     "departures": {
                         "departure": [{
-                            "departureTime": {"countdown": 5},
+                            "departureTime": {
+                                "timePlanned": "2025-12-16T10:29:00.000+0100",
+                                "timeReal": "2025-12-16T10:30:12.000+0100",
+                                "countdown": 5
+                            },
                             "vehicle": {"barrierFree": true, "realtimeSupported": true}
                         }]
                     }
@@ -77,189 +194,441 @@ def transform_response(api_response):
         "message": {"serverTime": "2025-12-16T10:25:00.000+0100"}
     }
 
-    Output structure (matching proxy format):
+    Output structure:
     {
-        "data": [{
-            "name": "Stop Name",
-            "diva": "60201438",
-            "lines": [{
-                "name": "49",
-                "direction": "R",
-                "towards": "DESTINATION",
-                "departures": [{"countdown": 5}]
-            }]
-        }],
+        "data": [LineDepartures(stop="Stop Name", diva="60201438", name="49",
+                                direction="R", towards="DESTINATION",
+                                countdowns=array('h', [5]),
+                                times=array('l', [<local clock of 10:30:12>]))],
         "localeTimestamp": "2025-12-16 10:25:00"
     }
-    """
-    # Use dict to merge stops with same DIVA ID
-    stops_by_diva = {}
 
-    monitors = api_response.get('data', {}).get('monitors', [])
-    line_filters = get_line_filters()
+    Departure times (timeReal, else timePlanned) are anchored to serverTime
+    and stored on the local clock, see departures.refresh_countdowns().
 
-    for monitor in monitors:
-        # Extract stop info
-        props = monitor.get('locationStop', {}).get('properties', {})
-        diva = props.get('name', '')
-        stop_name = props.get('title', '')
+    Stop, line and destination strings are interned in
+    departures.shared_strings, so records of the same stop or line share one
+    string object, also with the records of earlier fetches.
 
-        # Skip if this DIVA is not in our filter
-        if diva not in line_filters:
-            continue
-
-        allowed_lines = line_filters[diva]
+    Only the departures that can be drawn are kept: those below the line's
+    minimum countdown are skipped and the rest is cut to departure_limit
+    while parsing, so the records scale with the screen rows, not with the
+    response.
 
-        for line in monitor.get('lines', []):
-            line_name = line.get('name', '')
-            line_direction = line.get('direction', '')
+    The response is validated in the same pass: a monitor with a missing
+    stop, a line without a name or a departure without a numeric countdown
+    rejects that monitor. A response without a monitors array raises
+    ValueError.
+    """
+    js = JsonStream(stream, buffer=buffer)
+    if line_filters is None:
+        line_filters = get_filter_index()
+    if departure_limit is None:
+        departure_limit = get_departure_budget()
+    if min_countdowns is None:
+        min_countdowns = get_layout_config()['min_countdown']
+    trim = (departure_limit, min_countdowns)
+
+    lines = []
+    strings = shared_strings
+    server_time = ''
+    has_monitors = False
+
+    for key in js.iter_object():
+        if key == 'data' and js.peek_type() == 'object':
+            for data_key in js.iter_object():
+                if data_key == 'monitors' and js.peek_type() == 'array':
+                    has_monitors = True
+                    for _ in js.iter_array():
+                        _read_monitor(js, line_filters, lines, strings, trim)
+                else:
+                    js.skip_value()
+        elif key == 'message' and js.peek_type() == 'object':
+            for message_key in js.iter_object():
+                if message_key == 'serverTime':
+                    server_time = js.read_value() or ''
+                else:
+                    js.skip_value()
+        else:
+            js.skip_value()
+
+    _log.debug('transform_response: parsed {} bytes', js.bytes_read)
+    if not has_monitors:
+        raise ValueError('Invalid API response structure: no monitors')
+
+    if received_at is None:
+        received_at = utime.time()
+    anchor_departures(lines, parse_iso_timestamp(server_time), received_at)
 
-            # Check if line passes filter
-            if line_name not in allowed_lines:
-                continue
+    return {
+        'data': lines,
+        'localeTimestamp': parse_server_time(server_time),
+    }
 
-            allowed_directions = allowed_lines[line_name]
-            if allowed_directions and line_direction not in allowed_directions:
-                continue
 
-            # Extract departures
-            departures_data = line.get('departures', {}).get('departure', [])
-            departures = []
-
-            for dep in departures_data:
-                dep_time = dep.get('departureTime', {})
-                departures.append({
-                    'countdown': dep_time.get('countdown', 0),
-                })
-
-            if departures:
-                # Create stop entry if needed
-                if diva not in stops_by_diva:
-                    stops_by_diva[diva] = {
-                        'name': stop_name,
-                        'diva': diva,
-                        'lines': [],
-                    }
+def _line_allowed(allowed_lines, line_name, line_direction):
+    """Check a line against the compiled filter of its stop."""
+    return (allowed_lines.get(line_name, 0) & direction_bit(line_direction)) != 0
 
-                stops_by_diva[diva]['lines'].append({
-                    'name': line_name,
-                    'direction': line_direction,
-                    'towards': line.get('towards', ''),
-                    'departures': departures,
-                })
 
-    result_data = list(stops_by_diva.values())
+def _read_monitor(js, line_filters, result, strings, trim):
+    """
+    Read one monitor object, appending matching lines to result.
+    Malformed monitors are consumed but contribute nothing.
+    """
+    diva = None
+    stop_name = ''
+    allowed_lines = None
+    lines = []
+    malformed = False
+
+    for key in js.iter_object():
+        if key == 'locationStop':
+            diva, stop_name = _read_location_stop(js)
+            allowed_lines = line_filters.get(diva)
+        elif key == 'lines' and js.peek_type() == 'array':
+            # Skip all lines of stops that are not in our filter
+            if diva is not None and allowed_lines is None:
+                js.skip_value()
+                continue
+            for _ in js.iter_array():
+                line = _read_line(js, allowed_lines, strings, trim)
+                if line is _MALFORMED:
+                    malformed = True
+                elif line is not None:
+                    lines.append(line)
+        else:
+            js.skip_value()
+
+    if not diva or malformed:
+        _log.warning('transform_response: rejecting malformed monitor {}', diva)
+        return
+
+    # locationStop may follow the lines - filter what was kept provisionally
+    if allowed_lines is None:
+        return
+    stop_name = strings.intern(stop_name)
+    diva = strings.intern(diva)
+    for line in lines:
+        if _line_allowed(allowed_lines, line.name, line.direction):
+            line.stop = stop_name
+            line.diva = diva
+            result.append(line)
+
+
+def _read_location_stop(js):
+    """Read locationStop and return (diva, stop title)."""
+    diva = ''
+    stop_name = ''
+    for key in js.iter_object():
+        if key == 'properties' and js.peek_type() == 'object':
+            for prop_key in js.iter_object():
+                if prop_key == 'name':
+                    diva = js.read_value() or ''
+                elif prop_key == 'title':
+                    stop_name = js.read_value() or ''
+                else:
+                    js.skip_value()
+        else:
+            js.skip_value()
+    return diva, stop_name
+
+
+def _read_line(js, allowed_lines, strings, trim):
+    """
+    Read one line object.
+
+    Departures are only materialized if the line can still match the filter
+    (allowed_lines is None while the stop is not yet known), and only up to
+    the departure limit of trim = (departure_limit, min_countdowns). If the
+    name follows the departures, they are read without the limit and
+    trimmed once the name, and so its minimum countdown, is known.
+    Returns a LineDepartures record without stop info, None if the line
+    was filtered out or has no departures, or _MALFORMED.
+    """
+    line_name = ''
+    line_direction = ''
+    towards = ''
+    countdowns = array('h')
+    times = array('l')
+    rejected = False
+    malformed = False
+    limit, min_countdowns = trim
+    minimum = 0
+    # Departures were read before the name: trim them when it is known
+    deferred = False
+
+    for key in js.iter_object():
+        if key == 'name':
+            line_name = js.read_value() or ''
+            rejected = allowed_lines is not None and line_name not in allowed_lines
+            minimum = min_countdowns.get(line_name, 0)
+        elif key == 'direction':
+            line_direction = js.read_value() or ''
+        elif key == 'towards':
+            towards = js.read_value() or ''
+        elif key == 'departures' and not rejected and js.peek_type() == 'object':
+            if allowed_lines is not None and line_name and line_direction:
+                if not _line_allowed(allowed_lines, line_name, line_direction):
+                    rejected = True
+                    js.skip_value()
+                    continue
+            deferred = not line_name
+            cap = 0 if deferred else limit
+            for dep_key in js.iter_object():
+                if dep_key == 'departure' and js.peek_type() == 'array':
+                    for _ in js.iter_array():
+                        countdown, departure_time = _read_departure(js)
+                        # Every departure is still read to validate it
+                        if countdown is None:
+                            malformed = True
+                        elif malformed or countdown < minimum:
+                            continue
+                        elif not cap or len(countdowns) < cap:
+                            countdowns.append(countdown)
+                            times.append(departure_time)
+                else:
+                    js.skip_value()
+        else:
+            js.skip_value()
+
+    if malformed or not line_name:
+        return _MALFORMED
+    if rejected or not countdowns:
+        return None
+    if allowed_lines is not None and not _line_allowed(allowed_lines, line_name, line_direction):
+        return None
 
-    # Generate timestamp from serverTime
-    server_time = api_response.get('message', {}).get('serverTime', '')
-    locale_timestamp = parse_server_time(server_time)
+    line = LineDepartures(
+        '', '',
+        strings.intern(line_name),
+        strings.intern(line_direction),
+        strings.intern(towards),
+        countdowns,
+        times,
+    )
+    if deferred:
+        # The name followed the departures, apply its minimum and the limit now
+        trim_departures(line, limit, minimum)
+        if not line.countdowns:
+            return None
+    return line
 
-    return {
-        'data': result_data,
-        'localeTimestamp': locale_timestamp,
-    }
 
+def _read_departure(js):
+    """
+    Read one departure object.
 
-def validate_response(data):
-    """Validate transformed response structure. Returns True if valid."""
-    if not isinstance(data, dict):
-        return False
-    if 'data' not in data or not isinstance(data['data'], list):
-        return False
-    if 'localeTimestamp' not in data:
-        return False
-    # Validate each stop has expected structure
-    for stop in data['data']:
-        if not isinstance(stop, dict) or 'lines' not in stop:
-            return False
-        for line in stop['lines']:
-            if not isinstance(line, dict) or 'name' not in line or 'departures' not in line:
-                return False
-    return True
+    Returns:
+        (countdown in minutes or None if it is missing or not a number,
+        departure time in epoch seconds on the server clock or 0 if the API
+        sent no timestamp)
+    """
+    countdown = None
+    time_planned = None
+    time_real = None
+    for key in js.iter_object():
+        if key == 'departureTime' and js.peek_type() == 'object':
+            for time_key in js.iter_object():
+                if time_key == 'countdown':
+                    countdown = js.read_value()
+                    if not isinstance(countdown, int):
+                        countdown = None
+                elif time_key == 'timeReal':
+                    time_real = js.read_value()
+                elif time_key == 'timePlanned':
+                    time_planned = js.read_value()
+                else:
+                    js.skip_value()
+        else:
+            js.skip_value()
+
+    departure_time = None
+    if time_real:
+        departure_time = parse_iso_timestamp(time_real)
+    if departure_time is None and time_planned:
+        departure_time = parse_iso_timestamp(time_planned)
+    return countdown, departure_time or 0
+
+
+def _log_departures(lines):
+    """Debug dump of the merged departures."""
+    for line in lines:
+        _log.debug('{}: {}', line.name, ', '.join(str(countdown) for countdown in line.countdowns))
 
 
 def get_data():
-    data = make_request()
-    if data is None:
-        return None
+    """
+    Fetch all stop batches one after another and merge them.
 
-    # Validate response structure before processing
-    if not validate_response(data):
-        print('Error: Invalid API response structure')
-        return None
+    A batch that fails keeps its last valid lines (countdowns continue to be
+    extrapolated from their departure times). Returns None only if no batch
+    produced data.
+    """
+    urls = build_api_urls()
+    lines = []
+    locale_timestamp = ''
+    fetched = 0
+
+    for batch_index, url in enumerate(urls):
+        # The response is validated while it is parsed
+        data = make_request(url)
+        fetch_samples.commit()
+        if log.enabled(log.INFO):
+            _log.info('timing (ms): {}', fetch_samples.describe())
+
+        if data is None:
+            last_good = _last_good_batches.get(batch_index)
+            if last_good:
+                last_good = [line for line in last_good if len(line.countdowns)]
+                _log.warning('batch {}/{} failed, keeping {} lines',
+                             batch_index + 1, len(urls), len(last_good))
+                lines.extend(last_good)
+            continue
 
-    print('--- Start Output ---\n')
+        fetched += 1
+        _last_good_batches[batch_index] = data['data']
+        lines.extend(data['data'])
+        if data['localeTimestamp']:
+            locale_timestamp = data['localeTimestamp']
+        # Release this batch's response before the next request
+        data = None
 
-    # Iterate through the data to extract and print departure times and countdowns
-    for stop in data['data']:
-        for line in stop['lines']:
-            line_name = line['name']
-            countdowns = [str(departure.get('countdown', '?')) for departure in line['departures']]
-            print('{}: {}'.format(line_name, ', '.join(countdowns)))
+    if not fetched:
+        return None
 
-    print('\n--- End Output ---\n')
+    # The dump's strings are only built at debug level
+    if log.enabled(log.DEBUG):
+        _log_departures(lines)
 
-    return data
+    return {
+        'data': lines,
+        'localeTimestamp': locale_timestamp,
+    }
 
 
-def make_request():
-    """Fetch data from Wiener Linien API and transform it."""
-    import ujson
+def _trim_lines(lines):
+    """Apply the layout's departure budget to records decoded from the proxy."""
+    limit = get_departure_budget()
+    min_countdowns = get_layout_config()['min_countdown']
+    for line in lines:
+        trim_departures(line, limit, min_countdowns.get(line.name, 0))
+    lines[:] = [line for line in lines if len(line.countdowns)]
 
-    url = build_api_url()
 
-    print('make_request: requesting from:', url)
+def _read_body(response, buffer):
+    """
+    Read a complete response body into the receive buffer.
 
-    # Force GC multiple times before request to maximize available memory
-    # This helps defragment memory for the TLS handshake which needs large contiguous blocks
-    print('make_request: running gc.collect() before request')
-    collect()
-    collect()
+    Returns:
+        memoryview of the body within buffer (valid until the next request)
+    """
+    length = response.content_length()
+    if length < 0:
+        raise ValueError('Binary response without Content-Length')
+    if length > len(buffer):
+        raise ValueError('Response body of {} bytes does not fit receive buffer of {} bytes'.format(
+            length, len(buffer)))
+
+    received = 0
+    while received < length:
+        n = response.readinto(buffer[received:length])
+        if not n:
+            raise OSError('Connection closed in response body')
+        received += n
+    return buffer[:length]
+
+
+def _gzip_accepted():
+    """Check if gzip is requested; 'auto' only with a SPIRAM heap."""
+    enabled = get_gzip_enabled()
+    if enabled == 'auto':
+        # The decompressor allocates a 32 KB window for every response
+        return memory.large_heap()
+    return bool(enabled)
+
+
+def make_request(url):
+    """Fetch one batch of stops from the Wiener Linien API and stream-parse it."""
+    _log.info('make_request: requesting from: {}', url)
+
+    # The streaming parser keeps the heap small, a single collection before
+    # a (possible) TLS handshake is enough
     collect()
 
-    # Log available memory for debugging
-    import gc as gc_module
-    print('make_request: free memory:', gc_module.mem_free(), 'bytes')
+    # Heap readings and phase timings of this request go into one sample,
+    # get_data() stores it
+    fetch_samples.start()
+    _log.debug('make_request: free memory: {} bytes', fetch_samples.get('free_before'))
 
+    conn = get_connection()
+    conn.sample = fetch_samples
     response = None
     try:
-        print('make_request: starting HTTP GET (timeout=5s)...')
-        response = requests.get(url, headers={'Accept': 'application/json'}, timeout=5)
-        print('make_request: HTTP GET complete, status:', response.status_code)
+        _log.debug('make_request: starting HTTP GET (timeout={}s, reused={})...',
+                   HTTP_TIMEOUT_SEC, conn.is_connected())
+        # The LAN proxy can answer in the compact binary format
+        accept = 'application/json'
+        if get_proxy_url() is not None:
+            accept = wire.CONTENT_TYPE + ', application/json'
+        headers = {'Accept': accept}
+        if _gzip_accepted():
+            headers['Accept-Encoding'] = 'gzip'
+        response = conn.get(split_url(url)[3], headers=headers)
+        _log.debug('make_request: HTTP GET complete, status: {}', response.status_code)
 
         if response.status_code != 200:
-            print('make_request: Error - non-200 response, closing')
+            _log.error('make_request: non-200 response ({}), closing', response.status_code)
             response.close()
+            response = None
             return None
 
-        # Stream JSON parsing - read directly from socket
-        # ujson.load() reads from file-like object
-        print('make_request: parsing JSON response...')
-        raw_data = ujson.load(response.raw)
-        print('make_request: JSON parsed successfully')
-
-        # Close response immediately after parsing
-        print('make_request: closing response')
+        # Fails with a clear error before anything is parsed if Content-Length is too large
+        max_bytes = get_max_response_bytes()
+        response.set_limit(max_bytes)
+        buffer = memory.reserve(RECEIVE_BUFFER, get_receive_buffer_size())
+        # Decompressed on the fly, the decoded body is never held in memory
+        body = content_stream(response, max_bytes)
+
+        # Time spent waiting for body bytes is counted as 'body' by the
+        # connection, the rest of the parse is CPU time
+        start = utime.ticks_us()
+        body_us = fetch_samples.get('body')
+        if response.headers.get('content-type', '').startswith(wire.CONTENT_TYPE):
+            if body is not response:
+                raise ValueError('Compressed binary responses are not supported')
+            _log.debug('make_request: decoding binary response...')
+            result = wire.decode(_read_body(response, buffer), utime.time())
+            _trim_lines(result['data'])
+        else:
+            # Parse and filter directly from the socket
+            _log.debug('make_request: parsing JSON response...')
+            result = transform_response(body, buffer=buffer)
+        fetch_samples.set('parse', elapsed_us(start) - (fetch_samples.get('body') - body_us))
+        if body is not response:
+            _log.info('make_request: {} bytes received, {} bytes decompressed',
+                      response.received, body.decoded)
+        else:
+            _log.info('make_request: {} bytes received (uncompressed)', response.received)
+
+        # Release the connection for reuse in the next cycle
         response.close()
         response = None
-        collect()
-
-        # Transform to simplified format
-        print('make_request: transforming response...')
-        result = transform_response(raw_data)
-        print('make_request: transformation complete')
+        if log.enabled(log.DEBUG):
+            _log.debug('make_request: connection stats: {}', conn.stats())
 
-        # Force garbage collection after transformation
+        # Free parser buffers before rendering
         collect()
 
         return result
 
     except Exception as e:
-        print('make_request: Error -', type(e).__name__, e)
-        import sys
-        sys.print_exception(e)
+        _log.exception('make_request: request failed', e)
+        # Connection state is unknown after an error - start fresh next time
+        conn.close()
+        response = None
         return None
     finally:
         if response is not None:
-            print('make_request: closing response in finally block')
+            _log.debug('make_request: closing response in finally block')
             response.close()
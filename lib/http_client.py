@@ -0,0 +1,623 @@
+"""
+Minimal HTTP/1.1 client with a persistent keep-alive connection.
+Keeps one socket (optionally TLS) open across requests so the handshake and
+its large buffer allocations are paid once instead of on every fetch. When the
+socket has to be reopened, the cached TLS session is offered for resumption.
+"""
+
+import socket
+import utime
+from lib import log, memory
+
+try:
+    import ssl
+except ImportError:
+    import ussl as ssl
+
+# Streaming decompression: MicroPython's deflate module, zlib on CPython
+try:
+    import deflate
+    import io
+except ImportError:
+    deflate = None
+    import zlib
+
+HTTP_PORT = 80
+HTTPS_PORT = 443
+
+_log = log.get_logger('http_client')
+
+# Scratch size used when draining unread response bodies
+_DRAIN_CHUNK_SIZE = 256
+
+# Names of the buffers reserved with the memory planner
+DRAIN_BUFFER = 'drain'
+GZIP_INPUT_BUFFER = 'gzip_input'
+
+# Default lifetime of a cached DNS answer
+DNS_TTL_SEC = 300
+
+
+def reserve_buffers():
+    """
+    Reserve the client's scratch buffers with the memory planner. Call early
+    at boot; without it they are reserved on first use.
+    """
+    memory.reserve(DRAIN_BUFFER, _DRAIN_CHUNK_SIZE)
+    if deflate is None:
+        memory.reserve(GZIP_INPUT_BUFFER, _DRAIN_CHUNK_SIZE * 2)
+
+
+def split_url(url):
+    """
+    Split an http(s) URL into its parts.
+
+    Returns:
+        (use_tls, host, port, path) tuple
+    """
+    if url.startswith('https://'):
+        use_tls = True
+        rest = url[8:]
+    elif url.startswith('http://'):
+        use_tls = False
+        rest = url[7:]
+    else:
+        raise ValueError('Unsupported URL scheme: ' + url)
+
+    slash = rest.find('/')
+    if slash < 0:
+        host, path = rest, '/'
+    else:
+        host, path = rest[:slash], rest[slash:]
+
+    port = HTTPS_PORT if use_tls else HTTP_PORT
+    if ':' in host:
+        host, port_str = host.split(':', 1)
+        port = int(port_str)
+
+    return use_tls, host, port, path
+
+
+class Resolver:
+    """
+    DNS cache with a fixed TTL.
+
+    Answers are kept for ttl seconds. When the resolver fails, the last
+    known address is served even if it has expired (serve-stale), so a
+    flaky DNS server does not fail a fetch.
+    """
+
+    def __init__(self, ttl=DNS_TTL_SEC):
+        """
+        Args:
+            ttl: Seconds a resolved address is used without asking again
+        """
+        self.ttl = ttl
+        self._cache = {}  # (host, port) -> [address, resolved at (ticks_ms)]
+
+        # Counters for diagnostics
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.failures = 0
+
+    def resolve(self, host, port):
+        """
+        Return a socket address for host and port.
+
+        Raises the resolver's OSError only if the host was never resolved.
+        """
+        key = (host, port)
+        entry = self._cache.get(key)
+        now = utime.ticks_ms()
+        if entry is not None and utime.ticks_diff(now, entry[1]) < self.ttl * 1000:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        try:
+            address = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][-1]
+        except OSError as e:
+            self.failures += 1
+            if entry is None:
+                raise
+            self.stale += 1
+            _log.warning('DNS lookup for {} failed ({}), using cached address', host, e)
+            return entry[0]
+
+        self._cache[key] = [address, now]
+        return address
+
+    def expire(self, host, port):
+        """Re-resolve host on next use, keeping the address as a stale fallback."""
+        entry = self._cache.get((host, port))
+        if entry is not None:
+            entry[1] = utime.ticks_add(utime.ticks_ms(), -self.ttl * 1000)
+
+    def stats(self):
+        """Return resolver counters as a dict."""
+        return {
+            'dns_hits': self.hits,
+            'dns_misses': self.misses,
+            'dns_stale': self.stale,
+            'dns_failures': self.failures,
+        }
+
+
+class HTTPResponse:
+    """
+    Response of a keep-alive request.
+
+    The body is exposed as a stream through readinto(). close() must always
+    be called; it drains the unread body so the connection can be reused.
+    """
+
+    def __init__(self, conn, status_code, headers):
+        self._conn = conn
+        self.status_code = status_code
+        self.headers = headers
+
+        # Optional cap on the body size, see set_limit()
+        self.limit = 0
+        self.received = 0
+
+        self._chunked = 'chunked' in headers.get('transfer-encoding', '')
+        length = headers.get('content-length')
+        if self._chunked:
+            self._remaining = 0  # Bytes left in the current chunk
+        else:
+            self._remaining = int(length) if length is not None else -1
+        self._done = not self._chunked and self._remaining == 0
+
+        # Without a length or chunked framing the body ends when the socket closes
+        self.keep_alive = (
+            conn.keep_alive_allowed
+            and headers.get('connection', '').lower() != 'close'
+            and (self._chunked or self._remaining >= 0)
+        )
+
+    def _next_chunk(self):
+        """Read the next chunk header. Returns False on the final chunk."""
+        stream = self._conn.stream
+        line = stream.readline()
+        if not line:
+            raise OSError('Connection closed in chunk header')
+        size = int(line.split(b';')[0].strip(), 16)
+        if size == 0:
+            # Skip trailers up to the terminating empty line
+            while True:
+                line = stream.readline()
+                if not line or line == b'\r\n':
+                    break
+            return False
+        self._remaining = size
+        return True
+
+    def content_length(self):
+        """Return the announced body length, or -1 if unknown."""
+        length = self.headers.get('content-length')
+        return int(length) if length is not None else -1
+
+    def set_limit(self, max_bytes):
+        """
+        Refuse bodies larger than max_bytes.
+
+        Raises ValueError right away if Content-Length exceeds the limit,
+        otherwise readinto() raises once more bytes have arrived.
+        """
+        self.limit = max_bytes
+        length = self.content_length()
+        if length > max_bytes:
+            raise ValueError('Response body of {} bytes exceeds limit of {} bytes'.format(
+                length, max_bytes))
+
+    def readinto(self, buf):
+        """Read body bytes into buf. Returns 0 at the end of the body."""
+        if self._done:
+            return 0
+
+        if self._chunked and self._remaining == 0:
+            if not self._next_chunk():
+                self._done = True
+                return 0
+
+        mv = memoryview(buf)
+        if self._remaining >= 0 and self._remaining < len(mv):
+            mv = mv[:self._remaining]
+
+        conn = self._conn
+        start = utime.ticks_us()
+        n = conn.stream.readinto(mv)
+        conn.record_phase('body', start)
+        if not n:
+            if self._remaining < 0:
+                # Body delimited by connection close
+                self._done = True
+                return 0
+            raise OSError('Connection closed in response body')
+
+        self.received += n
+        if self.limit and self.received > self.limit:
+            raise ValueError('Response body exceeds limit of {} bytes'.format(self.limit))
+
+        if self._remaining >= 0:
+            self._remaining -= n
+            if self._remaining == 0:
+                if self._chunked:
+                    self._conn.stream.readline()  # CRLF after chunk data
+                else:
+                    self._done = True
+        return n
+
+    def close(self):
+        """Finish the response and hand the connection back (or close it)."""
+        conn = self._conn
+        if conn is None:
+            return
+
+        if self.keep_alive:
+            try:
+                scratch = memory.reserve(DRAIN_BUFFER, _DRAIN_CHUNK_SIZE)
+                while self.readinto(scratch):
+                    pass
+            except (OSError, ValueError):
+                self.keep_alive = False
+
+        self._conn = None
+        conn.release(self.keep_alive)
+
+
+if deflate is not None:
+    class _StreamAdapter(io.IOBase):
+        """Exposes HTTPResponse.readinto() through the stream protocol for DeflateIO."""
+
+        def __init__(self, response):
+            self._response = response
+
+        def readinto(self, buf):
+            return self._response.readinto(buf)
+
+
+class GzipReader:
+    """
+    Decompresses a gzip-encoded response body while it is being read.
+
+    Only the compressor window and one input chunk are held in memory,
+    never the decompressed body.
+    """
+
+    def __init__(self, response, max_bytes=0):
+        """
+        Args:
+            response: HTTPResponse with Content-Encoding: gzip
+            max_bytes: Refuse more than this many decompressed bytes (0 = no limit)
+        """
+        self._response = response
+        self.limit = max_bytes
+        self.decoded = 0
+
+        if deflate is not None:
+            self._inflater = deflate.DeflateIO(_StreamAdapter(response), deflate.GZIP)
+        else:
+            self._inflater = None
+            self._zlib = zlib.decompressobj(31)
+            self._input = memory.reserve(GZIP_INPUT_BUFFER, _DRAIN_CHUNK_SIZE * 2)
+
+    def _zlib_readinto(self, buf):
+        """CPython fallback for DeflateIO.readinto()."""
+        d = self._zlib
+        while True:
+            if d.unconsumed_tail:
+                data = d.unconsumed_tail
+            elif d.eof:
+                return 0
+            else:
+                n = self._response.readinto(self._input)
+                if not n:
+                    raise OSError('Truncated gzip response body')
+                data = bytes(self._input[:n])
+            out = d.decompress(data, len(buf))
+            if out:
+                buf[:len(out)] = out
+                return len(out)
+
+    def readinto(self, buf):
+        """Read decompressed bytes into buf. Returns 0 at the end of the body."""
+        if self._inflater is not None:
+            n = self._inflater.readinto(buf)
+        else:
+            n = self._zlib_readinto(buf)
+        self.decoded += n
+        if self.limit and self.decoded > self.limit:
+            raise ValueError('Decompressed response body exceeds limit of {} bytes'.format(self.limit))
+        return n
+
+
+def content_stream(response, max_bytes=0):
+    """
+    Return a readinto() stream of the decoded response body.
+
+    Args:
+        response: HTTPResponse
+        max_bytes: Limit for the decompressed size of a compressed body
+
+    Returns:
+        GzipReader for gzip bodies, the response itself otherwise
+    """
+    encoding = response.headers.get('content-encoding', 'identity').lower()
+    if encoding == 'gzip':
+        return GzipReader(response, max_bytes)
+    if encoding != 'identity':
+        raise ValueError('Unsupported Content-Encoding: ' + encoding)
+    return response
+
+
+class HTTPConnection:
+    """
+    Persistent HTTP/1.1 connection to a single host.
+
+    The socket is opened on first use and kept alive between requests. If the
+    server has closed an idle connection, the request is transparently
+    retried once on a fresh connection.
+    """
+
+    def __init__(self, host, port=HTTPS_PORT, use_tls=True, timeout=5, resolver=None):
+        """
+        Args:
+            host: Server host name
+            port: Server port
+            use_tls: Wrap the socket in TLS
+            timeout: Socket timeout in seconds
+            resolver: Resolver caching the host's address (a private one
+                with the default TTL if not given)
+        """
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.resolver = resolver if resolver is not None else Resolver()
+        self.keep_alive_allowed = True
+
+        self._sock = None
+        self.stream = None
+        self._busy = False
+
+        # TLS context and session state survive socket and Wi-Fi drops
+        self._tls_context = None
+        self._tls_session = None
+        self._session_supported = True
+
+        # Optional metrics.SampleRing receiving per-phase timings
+        self.sample = None
+
+        # Counters for diagnostics
+        self.requests = 0
+        self.handshakes = 0
+        self.full_handshakes = 0
+        self.resumed_handshakes = 0
+        self.reuses = 0
+        self.reconnects = 0
+
+    def is_connected(self):
+        """Check if a socket is currently open."""
+        return self._sock is not None
+
+    def record_phase(self, phase, start):
+        """Add the microseconds since start (utime.ticks_us()) to a phase."""
+        if self.sample is not None:
+            self.sample.add(phase, utime.ticks_diff(utime.ticks_us(), start))
+
+    def _open(self):
+        """Open a new socket (and TLS session) to the server."""
+        start = utime.ticks_us()
+        addr = self.resolver.resolve(self.host, self.port)
+        self.record_phase('dns', start)
+        sock = socket.socket()
+        # Only a failed handshake that offered the cached session is retried
+        resuming = False
+        try:
+            sock.settimeout(self.timeout)
+            start = utime.ticks_us()
+            try:
+                sock.connect(addr)
+            except OSError:
+                # The host may have moved - ask DNS again next time
+                self.resolver.expire(self.host, self.port)
+                raise
+            self.record_phase('connect', start)
+            if self.use_tls:
+                resuming = self._session_supported and self._tls_session is not None
+                start = utime.ticks_us()
+                sock = self._wrap_tls(sock)
+                self.record_phase('tls', start)
+        except Exception:
+            sock.close()
+            if not resuming:
+                raise
+            # Server rejected the cached session - retry with a full handshake
+            _log.warning('TLS resumption failed, retrying with full handshake')
+            self._tls_session = None
+            self._open()
+            return
+
+        self._sock = sock
+        # MicroPython sockets are streams already, CPython needs a file wrapper
+        self.stream = sock if hasattr(sock, 'readinto') else sock.makefile('rwb')
+        self.handshakes += 1
+
+    def _wrap_tls(self, sock):
+        """Perform the TLS handshake, resuming the cached session if possible."""
+        if self._tls_context is None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            if hasattr(context, 'check_hostname'):
+                context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            self._tls_context = context
+
+        session = self._tls_session if self._session_supported else None
+        if session is not None:
+            tls_sock = self._tls_context.wrap_socket(
+                sock, server_hostname=self.host, session=session)
+        else:
+            tls_sock = self._tls_context.wrap_socket(sock, server_hostname=self.host)
+
+        if getattr(tls_sock, 'session_reused', False):
+            self.resumed_handshakes += 1
+        else:
+            self.full_handshakes += 1
+        # Without a session API (MicroPython's ssl) every handshake is a full one
+        if not hasattr(tls_sock, 'session'):
+            self._session_supported = False
+        return tls_sock
+
+    def _save_tls_session(self):
+        """Remember the session of the current socket for later resumption."""
+        if self._sock is None or not self._session_supported:
+            return
+        session = getattr(self._sock, 'session', None)
+        if session is not None:
+            self._tls_session = session
+
+    def close(self):
+        """Close the socket. The next request opens a new one."""
+        # Session tickets may arrive after the handshake, so save them late
+        self._save_tls_session()
+        sock = self._sock
+        stream = self.stream
+        self._sock = None
+        self.stream = None
+        self._busy = False
+        if stream is not None and stream is not sock:
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def release(self, keep_alive):
+        """Called by HTTPResponse.close() once the response is finished."""
+        self._busy = False
+        if not keep_alive:
+            self.close()
+
+    def _send_request(self, path, headers):
+        """Write the request line and headers."""
+        lines = ['GET ', path, ' HTTP/1.1\r\nHost: ', self.host, '\r\n']
+        if not self.keep_alive_allowed:
+            lines.append('Connection: close\r\n')
+        for name, value in headers.items():
+            lines.append(name)
+            lines.append(': ')
+            lines.append(value)
+            lines.append('\r\n')
+        lines.append('\r\n')
+
+        self.stream.write(''.join(lines).encode())
+        flush = getattr(self.stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def _read_head(self):
+        """
+        Read status line and headers.
+
+        Returns:
+            (status_code, headers) with lower-case header names,
+            or None if the server closed the connection before answering.
+        """
+        status_line = self.stream.readline()
+        if not status_line:
+            return None
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b'HTTP/'):
+            raise OSError('Invalid HTTP status line')
+        status_code = int(parts[1])
+
+        headers = {}
+        while True:
+            line = self.stream.readline()
+            if not line or line == b'\r\n':
+                break
+            colon = line.find(b':')
+            if colon > 0:
+                name = str(line[:colon], 'utf-8').strip().lower()
+                headers[name] = str(line[colon + 1:], 'utf-8').strip()
+
+        if parts[0] == b'HTTP/1.0' and headers.get('connection', '').lower() != 'keep-alive':
+            headers['connection'] = 'close'
+        return status_code, headers
+
+    def get(self, path, headers=None):
+        """
+        Send a GET request.
+
+        Args:
+            path: Request path including query string
+            headers: Optional dict of extra request headers
+
+        Returns:
+            HTTPResponse - the caller must close() it.
+        """
+        if self._busy:
+            # Previous response was never closed - its state is unknown
+            self.close()
+
+        if headers is None:
+            headers = {}
+
+        self.requests += 1
+        reused = self._sock is not None
+
+        head = None
+        try:
+            if not reused:
+                self._open()
+            start = utime.ticks_us()
+            self._send_request(path, headers)
+            head = self._read_head()
+            self.record_phase('headers', start)
+        except Exception:
+            self.close()
+            if not reused:
+                raise
+
+        if head is None:
+            if not reused:
+                self.close()
+                raise OSError('Connection closed by server')
+            # Idle keep-alive connection was closed by the server - retry once
+            _log.info('connection closed by server, reconnecting')
+            self.close()
+            self.reconnects += 1
+            self._open()
+            start = utime.ticks_us()
+            self._send_request(path, headers)
+            head = self._read_head()
+            self.record_phase('headers', start)
+            if head is None:
+                self.close()
+                raise OSError('Connection closed by server')
+        elif reused:
+            self.reuses += 1
+
+        self._save_tls_session()
+
+        self._busy = True
+        return HTTPResponse(self, head[0], head[1])
+
+    def stats(self):
+        """Return connection and resolver counters as a dict."""
+        stats = {
+            'requests': self.requests,
+            'handshakes': self.handshakes,
+            'full_handshakes': self.full_handshakes,
+            'resumed_handshakes': self.resumed_handshakes,
+            'reuses': self.reuses,
+            'reconnects': self.reconnects,
+        }
+        stats.update(self.resolver.stats())
+        return stats
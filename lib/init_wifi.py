@@ -6,6 +6,9 @@ Wi-Fi connection is now handled by wifi_manager.py.
 import ntptime
 import utime
 from utime import sleep
+from lib import log
+
+_log = log.get_logger('ntp')
 
 NTP_RETRY_ATTEMPTS = 3
 NTP_RETRY_DELAY_SEC = 2
@@ -62,10 +65,10 @@ def sync_time():
     for attempt in range(NTP_RETRY_ATTEMPTS):
         try:
             ntptime.settime()
-            print('NTP time sync successful')
+            _log.info('NTP time sync successful')
             return True
         except Exception as e:
-            print('NTP time sync failed (attempt {}/{}):'.format(attempt + 1, NTP_RETRY_ATTEMPTS), e)
+            _log.warning('NTP time sync failed (attempt {}/{}): {}', attempt + 1, NTP_RETRY_ATTEMPTS, e)
             if attempt < NTP_RETRY_ATTEMPTS - 1:
                 sleep(NTP_RETRY_DELAY_SEC)
     return False
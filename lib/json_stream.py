@@ -0,0 +1,278 @@
+"""
+Incremental JSON reader for large HTTP responses.
+Pulls the stream in fixed-size chunks into a single buffer so that only the
+values the caller asks for are materialized - everything else is skipped
+without allocating.
+"""
+
+# Byte values used by the tokenizer
+_QUOTE = 0x22  # "
+_BACKSLASH = 0x5C  # \
+_COMMA = 0x2C  # ,
+_COLON = 0x3A  # :
+_OBJ_OPEN = 0x7B  # {
+_OBJ_CLOSE = 0x7D  # }
+_ARR_OPEN = 0x5B  # [
+_ARR_CLOSE = 0x5D  # ]
+
+_WHITESPACE = (0x20, 0x09, 0x0A, 0x0D)
+_SCALAR_END = (_COMMA, _OBJ_CLOSE, _ARR_CLOSE, 0x20, 0x09, 0x0A, 0x0D)
+
+# Single-character escapes (\n, \t, ...) mapped to their byte value
+_ESCAPES = {
+    0x22: 0x22, 0x5C: 0x5C, 0x2F: 0x2F, 0x62: 0x08,
+    0x66: 0x0C, 0x6E: 0x0A, 0x72: 0x0D, 0x74: 0x09,
+}
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+# UTF-8 of U+FFFD, replaces unpaired surrogate escapes
+_REPLACEMENT = b'\xef\xbf\xbd'
+
+
+class JsonStream:
+    """
+    Pull-style JSON tokenizer over a stream with readinto().
+
+    Navigate with iter_object()/iter_array() and consume every value with
+    one of read_string(), read_number(), read_value() or skip_value().
+    """
+
+    def __init__(self, stream, chunk_size=512, buffer=None):
+        """
+        Args:
+            stream: File-like object providing readinto() (e.g. a socket)
+            chunk_size: Size of the receive buffer in bytes
+            buffer: Optional preallocated bytearray/memoryview to read into
+                instead of allocating a new buffer (chunk_size is ignored)
+        """
+        self._stream = stream
+        self._mv = memoryview(buffer if buffer is not None else bytearray(chunk_size))
+        self._buf = self._mv
+        self._pos = 0
+        self._end = 0
+        self.bytes_read = 0
+
+    def _fill(self):
+        """Refill the buffer from the stream. Raises ValueError on EOF."""
+        n = self._stream.readinto(self._buf)
+        if not n:
+            raise ValueError('Unexpected end of JSON stream')
+        self._pos = 0
+        self._end = n
+        self.bytes_read += n
+
+    def _raw(self):
+        """Consume and return the next byte (whitespace included)."""
+        if self._pos >= self._end:
+            self._fill()
+        b = self._buf[self._pos]
+        self._pos += 1
+        return b
+
+    def _peek(self):
+        """Return the next non-whitespace byte without consuming it."""
+        while True:
+            if self._pos >= self._end:
+                self._fill()
+            b = self._buf[self._pos]
+            if b not in _WHITESPACE:
+                return b
+            self._pos += 1
+
+    def _expect(self, expected):
+        """Consume the next non-whitespace byte and check it."""
+        b = self._peek()
+        if b != expected:
+            raise ValueError('JSON: expected {!r}, got {!r}'.format(chr(expected), chr(b)))
+        self._pos += 1
+
+    def _scan_string(self, out):
+        """
+        Consume a string body up to and including the closing quote.
+        Appends the decoded bytes to out, or discards them if out is None.
+        A \\uXXXX surrogate pair is combined into one character, an
+        unpaired surrogate becomes U+FFFD.
+        """
+        # High surrogate waiting for its low half
+        high = 0
+        while True:
+            if self._pos >= self._end:
+                self._fill()
+            buf = self._buf
+            start = self._pos
+            end = self._end
+            i = start
+            b = 0
+            while i < end:
+                b = buf[i]
+                if b == _QUOTE or b == _BACKSLASH:
+                    break
+                i += 1
+            if i > start:
+                if high:
+                    high = self._unpaired(out)
+                if out is not None:
+                    out.extend(self._mv[start:i])
+            self._pos = i
+            if i == end:
+                continue
+
+            self._pos += 1
+            if b == _QUOTE:
+                if high:
+                    self._unpaired(out)
+                return
+
+            # Escape sequence
+            esc = self._raw()
+            if esc == 0x75:  # \uXXXX
+                code = 0
+                for _ in range(4):
+                    code = code * 16 + int(chr(self._raw()), 16)
+                if 0xDC00 <= code <= 0xDFFF:
+                    if high:
+                        code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+                        high = 0
+                    else:
+                        code = 0xFFFD
+                else:
+                    if high:
+                        high = self._unpaired(out)
+                    if 0xD800 <= code <= 0xDBFF:
+                        high = code
+                        continue
+                if out is not None:
+                    out.extend(chr(code).encode())
+            else:
+                if high:
+                    high = self._unpaired(out)
+                if out is not None:
+                    out.append(_ESCAPES.get(esc, esc))
+
+    @staticmethod
+    def _unpaired(out):
+        """Write U+FFFD for a high surrogate without its low half; returns 0."""
+        if out is not None:
+            out.extend(_REPLACEMENT)
+        return 0
+
+    def _scan_scalar(self):
+        """Consume a number or literal and return its raw text."""
+        out = bytearray()
+        while True:
+            if self._pos >= self._end:
+                n = self._stream.readinto(self._buf)
+                if not n:
+                    break  # Top-level scalar may end at EOF
+                self._pos = 0
+                self._end = n
+                self.bytes_read += n
+            b = self._buf[self._pos]
+            if b in _SCALAR_END:
+                break
+            out.append(b)
+            self._pos += 1
+        if not out:
+            raise ValueError('JSON: expected a value')
+        return str(out, 'utf-8')
+
+    def peek_type(self):
+        """
+        Return the type of the next value without consuming it:
+        'object', 'array', 'string' or 'scalar'.
+        """
+        b = self._peek()
+        if b == _OBJ_OPEN:
+            return 'object'
+        if b == _ARR_OPEN:
+            return 'array'
+        if b == _QUOTE:
+            return 'string'
+        return 'scalar'
+
+    def iter_object(self):
+        """Yield the keys of an object. The caller must consume each value."""
+        self._expect(_OBJ_OPEN)
+        if self._peek() == _OBJ_CLOSE:
+            self._pos += 1
+            return
+        while True:
+            key = self.read_string()
+            self._expect(_COLON)
+            yield key
+            b = self._peek()
+            self._pos += 1
+            if b == _OBJ_CLOSE:
+                return
+            if b != _COMMA:
+                raise ValueError('JSON: expected , or } in object')
+
+    def iter_array(self):
+        """Yield once per array element. The caller must consume each element."""
+        self._expect(_ARR_OPEN)
+        if self._peek() == _ARR_CLOSE:
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            b = self._peek()
+            self._pos += 1
+            if b == _ARR_CLOSE:
+                return
+            if b != _COMMA:
+                raise ValueError('JSON: expected , or ] in array')
+
+    def read_string(self):
+        """Read a string value."""
+        self._expect(_QUOTE)
+        out = bytearray()
+        self._scan_string(out)
+        return str(out, 'utf-8')
+
+    def read_number(self):
+        """Read a numeric value as int or float."""
+        self._peek()
+        text = self._scan_scalar()
+        if '.' in text or 'e' in text or 'E' in text:
+            return float(text)
+        return int(text)
+
+    def read_value(self):
+        """Read and fully materialize the next value (use for small values only)."""
+        kind = self.peek_type()
+        if kind == 'string':
+            return self.read_string()
+        if kind == 'object':
+            return {key: self.read_value() for key in self.iter_object()}
+        if kind == 'array':
+            return [self.read_value() for _ in self.iter_array()]
+        text = self._scan_scalar()
+        if text in _LITERALS:
+            return _LITERALS[text]
+        if '.' in text or 'e' in text or 'E' in text:
+            return float(text)
+        return int(text)
+
+    def skip_value(self):
+        """Consume the next value without materializing it."""
+        depth = 0
+        while True:
+            b = self._peek()
+            if b == _QUOTE:
+                self._pos += 1
+                self._scan_string(None)
+            elif b == _OBJ_OPEN or b == _ARR_OPEN:
+                self._pos += 1
+                depth += 1
+            elif b == _OBJ_CLOSE or b == _ARR_CLOSE:
+                self._pos += 1
+                depth -= 1
+            elif b == _COMMA or b == _COLON:
+                self._pos += 1
+            else:
+                self._scan_scalar()
+            if depth <= 0:
+                return
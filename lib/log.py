@@ -0,0 +1,211 @@
+"""
+Leveled logging for the device modules.
+
+Messages are format strings with their arguments passed separately; they
+are only formatted if the level is enabled, so a disabled call costs one
+comparison. Loops that would have to build arguments first can check
+enabled() instead.
+
+Records go to the serial console and, if configured, to an in-RAM ring
+(dumped on demand) and to a rotating log file on flash.
+"""
+
+import os
+import sys
+import utime
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+DEBUG = const(10)
+INFO = const(20)
+WARNING = const(30)
+ERROR = const(40)
+OFF = const(100)
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'error': ERROR, 'off': OFF}
+_LABELS = {DEBUG: 'D', INFO: 'I', WARNING: 'W', ERROR: 'E'}
+
+# Records below this level are dropped before formatting
+_level = INFO
+
+# Optional sinks, see configure()
+_ring = None
+_flash = None
+
+
+class RingSink:
+    """Keeps the last N formatted records in RAM."""
+
+    def __init__(self, size):
+        self._lines = [None] * size
+        self._next = 0
+        self.count = 0
+
+    def write(self, line):
+        self._lines[self._next] = line
+        self._next = (self._next + 1) % len(self._lines)
+        if self.count < len(self._lines):
+            self.count += 1
+
+    def lines(self):
+        """Return the stored records, oldest first."""
+        size = len(self._lines)
+        start = (self._next - self.count) % size
+        return [self._lines[(start + i) % size] for i in range(self.count)]
+
+
+class FlashSink:
+    """
+    Appends records to a file, rotating it to path.1 ... path.N when it
+    grows past max_bytes.
+    """
+
+    def __init__(self, path, max_bytes, backups=1, level=WARNING):
+        """
+        Args:
+            path: Log file path
+            max_bytes: Rotate once the file exceeds this size
+            backups: Number of rotated files kept
+            level: Lowest level written to flash (spares flash wear)
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.level = level
+        try:
+            self._size = os.stat(path)[6]
+        except OSError:
+            self._size = 0
+
+    def _rotate(self):
+        for i in range(self.backups, 0, -1):
+            source = self.path if i == 1 else '{}.{}'.format(self.path, i - 1)
+            try:
+                os.rename(source, '{}.{}'.format(self.path, i))
+            except OSError:
+                pass
+        if not self.backups:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+        self._size = 0
+
+    def write(self, line):
+        if self._size > self.max_bytes:
+            self._rotate()
+        record = '{} {}\n'.format(utime.time(), line)
+        try:
+            # Opened per record so nothing is lost on a watchdog reset
+            with open(self.path, 'a') as f:
+                f.write(record)
+        except OSError:
+            return
+        self._size += len(record)
+
+    def write_exception(self, exc):
+        try:
+            with open(self.path, 'a') as f:
+                _print_exception(exc, f)
+        except OSError:
+            pass
+
+
+def _print_exception(exc, file=None):
+    """Print a traceback (MicroPython and CPython)."""
+    print_exception = getattr(sys, 'print_exception', None)
+    if print_exception is not None:
+        if file is None:
+            print_exception(exc)
+        else:
+            print_exception(exc, file)
+    else:
+        import traceback
+        traceback.print_exception(exc, file=file)
+
+
+def configure(level=INFO, ring_lines=0, flash_path=None, flash_max_bytes=16384,
+              flash_backups=1, flash_level=WARNING):
+    """
+    Set the level and the optional sinks.
+
+    Args:
+        level: Lowest level logged (DEBUG ... ERROR, or OFF)
+        ring_lines: Keep this many records in RAM (0 = no ring)
+        flash_path: Also append records to this file (None = no file)
+        flash_max_bytes: Rotate the file once it exceeds this size
+        flash_backups: Number of rotated files kept
+        flash_level: Lowest level written to the file
+    """
+    global _level, _ring, _flash
+    _level = level
+    _ring = RingSink(ring_lines) if ring_lines > 0 else None
+    _flash = FlashSink(flash_path, flash_max_bytes, flash_backups, flash_level) if flash_path else None
+
+
+def enabled(level):
+    """Check if records of this level are logged."""
+    return level >= _level
+
+
+def _emit(level, name, msg, args):
+    if args:
+        msg = msg.format(*args)
+    line = '{} {}: {}'.format(_LABELS[level], name, msg)
+    print(line)
+    if _ring is not None:
+        _ring.write(line)
+    if _flash is not None and level >= _flash.level:
+        _flash.write(line)
+
+
+def dump_ring():
+    """Print the records kept in the RAM ring."""
+    if _ring is None:
+        print('log: no RAM ring configured')
+        return
+    print('log: last {} records'.format(_ring.count))
+    for line in _ring.lines():
+        print(line)
+
+
+class Logger:
+    """Named logger; messages are str.format() templates."""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def debug(self, msg, *args):
+        if _level <= DEBUG:
+            _emit(DEBUG, self.name, msg, args)
+
+    def info(self, msg, *args):
+        if _level <= INFO:
+            _emit(INFO, self.name, msg, args)
+
+    def warning(self, msg, *args):
+        if _level <= WARNING:
+            _emit(WARNING, self.name, msg, args)
+
+    def error(self, msg, *args):
+        if _level <= ERROR:
+            _emit(ERROR, self.name, msg, args)
+
+    def exception(self, msg, exc):
+        """Log an error with the exception and its traceback."""
+        if _level <= ERROR:
+            _emit(ERROR, self.name, msg + ': {}: {}', (type(exc).__name__, exc))
+            _print_exception(exc)
+            if _flash is not None:
+                _flash.write_exception(exc)
+
+
+def get_logger(name):
+    """Return a logger whose records are tagged with name."""
+    return Logger(name)
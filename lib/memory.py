@@ -0,0 +1,111 @@
+"""
+Memory planner and heap telemetry.
+
+Buffers the fetch path needs every cycle are reserved once, early in
+initialize() while the heap still has large contiguous blocks, and handed
+out by name afterwards. Steady-state fetches then allocate no large blocks
+that could fragment the heap over a long uptime. The one exception is the
+32 KB gzip window, which MicroPython's decompressor allocates per response
+and cannot reuse; gzip is therefore only requested with a SPIRAM heap
+(see large_heap()) unless configured explicitly.
+
+Heap samples (free memory and largest free block of the MicroPython heap and
+of the ESP-IDF heap that holds the TLS buffers) are kept in a ring buffer,
+together with low-water marks since boot, to watch fragmentation over a
+multi-day soak.
+"""
+
+import utime
+from lib.metrics import SampleRing, mem_free, heap_size, largest_gc_block, idf_free, largest_free_block
+from lib import log
+
+_log = log.get_logger('memory')
+
+# Heap sample fields, in bytes ('time' in seconds)
+HEAP_FIELDS = ('time', 'gc_free', 'gc_largest', 'idf_free', 'idf_largest')
+
+# At the default interval of 30 minutes, one day of samples
+HEAP_SAMPLE_CAPACITY = 48
+
+# A MicroPython heap this large is in SPIRAM (internal RAM alone is smaller)
+LARGE_HEAP_BYTES = 1024 * 1024
+
+# Reserved buffers by name
+_buffers = {}
+
+heap_samples = SampleRing(HEAP_FIELDS, HEAP_SAMPLE_CAPACITY, 'heap samples')
+
+# Lowest largest-block readings since boot (-1 = not sampled yet)
+_low_water = {'gc_largest': -1, 'idf_largest': -1}
+
+
+def reserve(name, size):
+    """
+    Reserve a named buffer. Later calls with the same name return the
+    buffer reserved first.
+
+    Args:
+        name: Buffer name
+        size: Size in bytes
+
+    Returns:
+        memoryview of the buffer
+    """
+    buf = _buffers.get(name)
+    if buf is None:
+        buf = memoryview(bytearray(size))
+        _buffers[name] = buf
+        _log.debug('reserved {}: {} bytes', name, size)
+    return buf
+
+
+def reserved_bytes():
+    """Total size of all reserved buffers."""
+    return sum(len(buf) for buf in _buffers.values())
+
+
+def large_heap():
+    """
+    Check if the heap is in SPIRAM, where a 32 KB block per fetch does not
+    fragment it. Ports that cannot report the heap size (CPython) count
+    as large.
+    """
+    size = heap_size()
+    return size < 0 or size >= LARGE_HEAP_BYTES
+
+
+def sample_heap():
+    """
+    Record a heap sample and update the low-water marks.
+    Probes the largest allocatable block, so call it rarely.
+    """
+    heap_samples.start()
+    heap_samples.set('time', utime.time())
+    heap_samples.set('gc_free', mem_free())
+    heap_samples.set('gc_largest', largest_gc_block())
+    heap_samples.set('idf_free', idf_free())
+    heap_samples.set('idf_largest', largest_free_block())
+    heap_samples.commit()
+
+    for field in _low_water:
+        value = heap_samples.get(field)
+        if value >= 0 and (_low_water[field] < 0 or value < _low_water[field]):
+            _low_water[field] = value
+
+    if log.enabled(log.INFO):
+        _log.info('heap: {}', describe())
+
+
+def describe():
+    """Return the latest heap sample and the low-water marks as one line."""
+    return 'gc free={} largest={} (low {}), idf free={} largest={} (low {}), reserved={}'.format(
+        heap_samples.get('gc_free'), heap_samples.get('gc_largest'), _low_water['gc_largest'],
+        heap_samples.get('idf_free'), heap_samples.get('idf_largest'), _low_water['idf_largest'],
+        reserved_bytes())
+
+
+def dump(out=print):
+    """Write the heap samples and low-water marks, one line each."""
+    heap_samples.dump(out)
+    out('low water: gc_largest={} idf_largest={}'.format(
+        _low_water['gc_largest'], _low_water['idf_largest']))
@@ -0,0 +1,200 @@
+"""
+Fetch latency and heap instrumentation.
+Keeps the last N samples in fixed-size ring buffers (one preallocated array,
+no allocation per sample) and summarizes them as min/median/p95.
+"""
+
+import gc
+import utime
+from array import array
+
+# Fetch sample fields: phase durations in microseconds, then heap readings in bytes
+FIELDS = (
+    'dns', 'connect', 'tls', 'headers', 'body', 'parse', 'total',
+    'free_before', 'free_after', 'largest_before', 'largest_after',
+)
+PHASES = FIELDS[:7]
+
+DEFAULT_CAPACITY = 32
+
+# Resolution of largest_gc_block() in bytes
+GC_PROBE_STEP = 1024
+
+
+def largest_free_block():
+    """
+    Largest free block of the ESP-IDF data heap (where TLS buffers live),
+    or -1 if the port cannot report it.
+    """
+    try:
+        import esp32
+        return max(info[2] for info in esp32.idf_heap_info(esp32.HEAP_DATA))
+    except (ImportError, AttributeError, ValueError):
+        return -1
+
+
+def idf_free():
+    """Free ESP-IDF data heap in bytes, or -1 if the port cannot report it."""
+    try:
+        import esp32
+        return sum(info[1] for info in esp32.idf_heap_info(esp32.HEAP_DATA))
+    except (ImportError, AttributeError, ValueError):
+        return -1
+
+
+def mem_free():
+    """Free MicroPython heap in bytes, or -1 if the port cannot report it."""
+    try:
+        return gc.mem_free()
+    except AttributeError:
+        return -1
+
+
+def heap_size():
+    """Total MicroPython heap in bytes, or -1 if the port cannot report it."""
+    try:
+        return gc.mem_free() + gc.mem_alloc()
+    except AttributeError:
+        return -1
+
+
+def largest_gc_block():
+    """
+    Largest block the MicroPython heap can allocate right now, found by
+    probing allocations (to GC_PROBE_STEP bytes), or -1 if the port cannot
+    report free memory. Collects garbage and allocates - call it rarely.
+    """
+    high = mem_free()
+    if high < 0:
+        return -1
+    gc.collect()
+    low = 0
+    while high - low > GC_PROBE_STEP:
+        mid = (low + high) // 2
+        try:
+            block = bytearray(mid)
+            del block
+            low = mid
+        except MemoryError:
+            high = mid
+    gc.collect()
+    return low
+
+
+class SampleRing:
+    """Fixed-size ring buffer of integer samples with named fields."""
+
+    def __init__(self, fields, capacity=DEFAULT_CAPACITY, title='samples'):
+        """
+        Args:
+            fields: Tuple of field names
+            capacity: Number of samples kept
+            title: Heading printed by dump()
+        """
+        self.fields = fields
+        self.capacity = capacity
+        self.title = title
+        self._index = {name: i for i, name in enumerate(fields)}
+        self._data = array('l', [0] * (capacity * len(fields)))
+        self._next = 0
+        self.count = 0
+
+        # Sample being filled
+        self.current = array('l', [0] * len(fields))
+
+    def start(self):
+        """Begin a new sample with all fields cleared."""
+        current = self.current
+        for i in range(len(current)):
+            current[i] = 0
+
+    def get(self, field):
+        """Return a field of the current sample."""
+        return self.current[self._index[field]]
+
+    def set(self, field, value):
+        """Set a field of the current sample."""
+        self.current[self._index[field]] = value
+
+    def add(self, field, value):
+        """Add to a field of the current sample."""
+        self.current[self._index[field]] += value
+
+    def commit(self):
+        """Store the current sample in the ring."""
+        width = len(self.fields)
+        base = self._next * width
+        for i in range(width):
+            self._data[base + i] = self.current[i]
+        self._next = (self._next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def values(self, field):
+        """Return the stored values of a field, oldest first."""
+        width = len(self.fields)
+        index = self._index[field]
+        start = (self._next - self.count) % self.capacity
+        return [self._data[((start + i) % self.capacity) * width + index] for i in range(self.count)]
+
+    def summary(self, field):
+        """Return (min, median, p95) of a field, or None if empty."""
+        values = sorted(self.values(field))
+        if not values:
+            return None
+        n = len(values)
+        return values[0], values[n // 2], values[min(n - 1, (n * 95) // 100)]
+
+    def dump(self, out=print):
+        """Write all samples and the per-field summary, one line each."""
+        out('{}: {} of {}'.format(self.title, self.count, self.capacity))
+        out(' '.join(self.fields))
+        columns = [self.values(field) for field in self.fields]
+        for i in range(self.count):
+            out(' '.join(str(column[i]) for column in columns))
+        for field in self.fields:
+            stats = self.summary(field)
+            if stats is not None:
+                out('{}: min={} median={} p95={}'.format(field, stats[0], stats[1], stats[2]))
+
+
+class FetchSamples(SampleRing):
+    """Per-request phase timings plus heap readings before and after."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        super().__init__(FIELDS, capacity, 'fetch samples')
+        self._started = 0
+
+    def start(self):
+        """Begin a new sample: clear it and take the 'before' heap readings."""
+        super().start()
+        self.set('free_before', mem_free())
+        self.set('largest_before', largest_free_block())
+        self._started = utime.ticks_us()
+
+    def commit(self):
+        """
+        Finish the current sample: set 'total' to the time since start(),
+        take the 'after' heap readings and store it in the ring.
+        """
+        self.set('total', elapsed_us(self._started))
+        self.set('free_after', mem_free())
+        self.set('largest_after', largest_free_block())
+        super().commit()
+
+    def describe(self):
+        """Return the current sample as one line (phases in ms)."""
+        current = self.current
+        parts = ['{}={}'.format(name, current[i] // 1000) for i, name in enumerate(PHASES)]
+        parts.append('free={}->{}'.format(self.get('free_before'), self.get('free_after')))
+        parts.append('largest={}->{}'.format(self.get('largest_before'), self.get('largest_after')))
+        return ' '.join(parts)
+
+
+def elapsed_us(start):
+    """Microseconds since a ticks_us() reading."""
+    return utime.ticks_diff(utime.ticks_us(), start)
+
+
+# Samples of make_request, shared by get_data and the serial dump
+fetch_samples = FetchSamples()
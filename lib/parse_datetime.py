@@ -1,3 +1,5 @@
+import utime
+
 
 def parse_datetime(datetime_string):
     # Split the date and time
@@ -17,3 +19,29 @@ def parse_datetime(datetime_string):
     time_tuple = (year, month, day, hour, minute, second, 0, 0)
 
     return time_tuple
+
+
+def parse_iso_timestamp(timestamp):
+    """
+    Convert an API timestamp to seconds since the epoch (UTC).
+
+    Input: "2025-12-16T10:27:00.000+0100"
+    Returns None if the string cannot be parsed.
+    """
+    try:
+        date_part, time_part = timestamp.split('T')
+        year, month, day = map(int, date_part.split('-'))
+        hour, minute, second = map(int, time_part[:8].split(':'))
+
+        # Timezone suffix: "+0100", "-0200" or "Z"
+        offset = 0
+        for sign_char, sign in (('+', 1), ('-', -1)):
+            pos = time_part.rfind(sign_char)
+            if pos > 0:
+                tz = time_part[pos + 1:].replace(':', '')
+                offset = sign * (int(tz[:2]) * 3600 + int(tz[2:4]) * 60)
+                break
+
+        return utime.mktime((year, month, day, hour, minute, second, 0, 0)) - offset
+    except (ValueError, AttributeError):
+        return None
@@ -0,0 +1,111 @@
+"""
+Retry policy for failed fetches.
+Exponential backoff with jitter while the circuit is closed; after
+failure_threshold consecutive failures the circuit opens and no request is
+made until open_duration has passed. The next attempt is a single probe
+(half-open): success closes the circuit, failure opens it again.
+
+Time and randomness are injectable, so the policy can be driven by a
+virtual clock on the host.
+"""
+
+import random
+import utime
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+def _random_fraction():
+    """Uniform random number in [0, 1)."""
+    return random.getrandbits(16) / 65536
+
+
+class RetryPolicy:
+    """Backoff and circuit breaker state for one request path."""
+
+    def __init__(self, base_delay, max_delay, failure_threshold=3, open_duration=300,
+                 jitter=0.2, clock=None, rand=None):
+        """
+        Args:
+            base_delay: Delay after the first failure in seconds
+            max_delay: Ceiling for the backoff delay in seconds
+            failure_threshold: Consecutive failures that open the circuit
+            open_duration: Seconds the circuit stays open before a probe
+            jitter: Fraction of each delay that is randomized (0 = none);
+                spreads out displays that failed at the same moment
+            clock: Callable returning the time in seconds (utime.time)
+            rand: Callable returning a float in [0, 1)
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.open_duration = open_duration
+        self.jitter = jitter
+        self._clock = clock or utime.time
+        self._rand = rand or _random_fraction
+
+        self.failures = 0
+        self.failed_probes = 0
+        self.failing_since = None
+        self.opened_at = None
+        self.retry_at = 0
+
+    @property
+    def state(self):
+        """CLOSED, OPEN or HALF_OPEN (open and the open period is over)."""
+        if self.opened_at is None:
+            return CLOSED
+        if self._clock() >= self.retry_at:
+            return HALF_OPEN
+        return OPEN
+
+    def _jittered(self, delay):
+        """Take up to jitter * delay off a delay."""
+        return int(delay * (1 - self.jitter * self._rand()))
+
+    def record_success(self):
+        """Close the circuit and reset the backoff."""
+        self.failures = 0
+        self.failed_probes = 0
+        self.failing_since = None
+        self.opened_at = None
+        self.retry_at = 0
+
+    def record_failure(self):
+        """
+        Record a failed request.
+
+        Returns:
+            Seconds until the next request is allowed
+        """
+        now = self._clock()
+        if self.failing_since is None:
+            self.failing_since = now
+        self.failures += 1
+
+        if self.opened_at is not None:
+            # Half-open probe failed
+            self.failed_probes += 1
+            self.opened_at = now
+            delay = self.open_duration
+        elif self.failures >= self.failure_threshold:
+            self.opened_at = now
+            delay = self.open_duration
+        else:
+            delay = min(self.base_delay * (1 << (self.failures - 1)), self.max_delay)
+
+        delay = self._jittered(delay)
+        self.retry_at = now + delay
+        return delay
+
+    def failing_for(self):
+        """Seconds since the first failure of the current streak (0 if none)."""
+        if self.failing_since is None:
+            return 0
+        return self._clock() - self.failing_since
+
+    def describe(self):
+        """Short state summary for logs."""
+        return '{}, {} failures, {} failed probes'.format(self.state, self.failures, self.failed_probes)
@@ -0,0 +1,134 @@
+"""
+Adaptive fetch scheduler.
+Chooses the time until the next API request from the displayed departures,
+night service and how much the data moved since the last fetch. Failed
+fetches are timed by retry.RetryPolicy instead.
+"""
+
+# Departure times that moved more than this between fetches count as volatile
+VOLATILE_JUMP_SEC = 120
+
+# Refetch this long before the nearest departure reaches "arriving"
+ARRIVAL_LEAD_SEC = 60
+
+# Decision kinds counted in FetchScheduler.reason_counts
+REASONS = ('no departures', 'volatile', 'night service', 'default', 'next departure')
+
+
+def is_night_line(name):
+    """Check if a line is a night service line (N6, N49, ...)."""
+    return len(name) > 1 and name[0] == 'N' and name[1].isdigit()
+
+
+class FetchScheduler:
+    """
+    Computes the interval until the next fetch.
+
+    Every decision is kept in last_interval/last_reason so the chosen
+    interval can be logged, and counted per kind in reason_counts so the
+    rules can be tuned.
+    """
+
+    def __init__(self, base_interval, min_interval, max_interval):
+        """
+        Args:
+            base_interval: Normal interval in seconds (update_interval_sec)
+            min_interval: Floor for any chosen interval in seconds
+            max_interval: Ceiling for any chosen interval in seconds
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+
+        self.volatility = 0
+        self.last_interval = base_interval
+        self.last_reason = 'startup'
+        self.reason_counts = {kind: 0 for kind in REASONS}
+
+        # Departure times per line from the previous dataset
+        self._previous = {}
+
+    def record_success(self, lines):
+        """
+        Record a successful fetch and measure how far departures moved.
+
+        Args:
+            lines: New list of LineDepartures (times on the local clock)
+        """
+        jump = 0
+        previous = self._previous
+        current = {}
+        for line in lines:
+            key = (line.diva, line.name, line.direction)
+            current[key] = line.times
+            old_times = previous.get(key)
+            if old_times is None or not len(line.times) or not len(old_times):
+                continue
+            # Compare the first departure with the closest previously known one
+            first = line.times[0]
+            closest = min(abs(first - t) for t in old_times)
+            if closest > jump:
+                jump = closest
+
+        self._previous = current
+        self.volatility = jump
+
+    def _clamp(self, interval):
+        """Limit an interval to the configured floor and ceiling."""
+        if interval < self.min_interval:
+            return self.min_interval
+        if interval > self.max_interval:
+            return self.max_interval
+        return interval
+
+    def next_interval(self, lines, now):
+        """
+        Choose the interval until the next fetch.
+
+        Args:
+            lines: Currently displayed LineDepartures (or None)
+            now: Current local time in seconds
+
+        Returns:
+            (interval_sec, reason) tuple
+        """
+        if not lines:
+            interval = self.base_interval
+            kind = reason = 'no departures'
+        elif self.volatility >= VOLATILE_JUMP_SEC:
+            interval = self.min_interval
+            kind = 'volatile'
+            reason = 'volatile (jump {}s)'.format(self.volatility)
+        else:
+            night_only = True
+            nearest = -1
+            for line in lines:
+                if not is_night_line(line.name):
+                    night_only = False
+                for t in line.times:
+                    remaining = t - now
+                    # Departures already arriving cannot be improved by a fetch
+                    if remaining >= ARRIVAL_LEAD_SEC and (nearest < 0 or remaining < nearest):
+                        nearest = remaining
+
+            if night_only:
+                interval = self.max_interval
+                kind = reason = 'night service'
+            else:
+                interval = self.base_interval
+                kind = reason = 'default'
+
+            # Only pulls a long interval in: with a few lines some departure
+            # is nearly always a minute or two away, so going below the
+            # normal interval would fetch at the floor most of the time
+            if nearest >= 0 and interval > self.base_interval:
+                pulled = max(nearest - ARRIVAL_LEAD_SEC, self.base_interval)
+                if pulled < interval:
+                    interval = pulled
+                    kind = 'next departure'
+                    reason = 'next departure in {}s'.format(nearest)
+
+        self.reason_counts[kind] += 1
+        self.last_interval = self._clamp(interval)
+        self.last_reason = reason
+        return self.last_interval, reason
@@ -1,4 +1,7 @@
 import ujson
+from lib import log
+
+_log = log.get_logger('secrets')
 
 secrets = None
 
@@ -7,7 +10,7 @@ def load_secrets():
         with open('secrets.json') as fp:
             return ujson.loads(fp.read())
     except (OSError, ValueError) as e:
-        print('Error loading secrets:', e)
+        _log.error('Error loading secrets: {}', e)
         return {}
 
 def get_wifi_secrets():
@@ -19,5 +22,5 @@ def get_wifi_secrets():
     try:
         return secrets['wifi']['ssid'], secrets['wifi']['password']
     except (KeyError, TypeError):
-        print('Error: secrets.json missing wifi.ssid or wifi.password')
+        _log.error('secrets.json missing wifi.ssid or wifi.password')
         raise ValueError('Invalid secrets.json format. Expected: {"wifi": {"ssid": "...", "password": "..."}}') from None
@@ -0,0 +1,99 @@
+"""
+Last-good departure dataset on flash.
+
+The latest fetched dataset is saved in the binary wire format (departure
+times relative to the save time), at most every interval_sec to spare the
+flash. It is written to a temporary file and renamed over the previous one,
+so a reset while writing leaves the old snapshot intact.
+
+On boot the snapshot is shown before Wi-Fi and NTP are up: if the RTC kept
+the time across the reset, countdowns are extrapolated from the saved
+departure times; otherwise they are shown as saved, marked stale.
+"""
+
+import os
+from lib.config import get_snapshot_config, get_layout_config
+from lib.departures import refresh_countdowns
+from lib import log, wire
+
+_log = log.get_logger('snapshot')
+
+# Time of the last write, None until the first one
+_last_saved = None
+
+
+def save(lines, now, force=False):
+    """
+    Write the dataset to flash if the save interval has passed.
+
+    Args:
+        lines: List of LineDepartures with times on the local clock
+        now: Current time (utime.time())
+        force: Write even if the interval has not passed
+
+    Returns:
+        True if the snapshot was written
+    """
+    global _last_saved
+    path, interval, _ = get_snapshot_config()
+    if not path:
+        return False
+    if not force and _last_saved is not None and now - _last_saved < interval:
+        return False
+
+    temp_path = path + '.tmp'
+    try:
+        payload = wire.encode(lines, now)
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.rename(temp_path, path)
+    except OSError as e:
+        _log.warning('save failed: {}', e)
+        return False
+
+    _last_saved = now
+    _log.debug('saved {} lines ({} bytes)', len(lines), len(payload))
+    return True
+
+
+def load(now):
+    """
+    Read the saved dataset.
+
+    Args:
+        now: Current time (utime.time()), possibly not yet set by NTP
+
+    Returns:
+        (lines, saved_at) with countdowns extrapolated to now if the clock
+        is plausible, or None if there is no usable snapshot
+    """
+    path, _, max_age = get_snapshot_config()
+    if not path:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            payload = f.read()
+    except OSError:
+        return None
+
+    try:
+        saved_at = wire.reference_time(payload)
+        # Keep the times on the clock they were saved with
+        lines = wire.decode(payload, saved_at)['data']
+    except (ValueError, IndexError, UnicodeError) as e:
+        _log.warning('ignoring unreadable snapshot: {}', e)
+        return None
+
+    if now >= saved_at:
+        if now - saved_at > max_age:
+            _log.info('snapshot is {}s old, not shown', now - saved_at)
+            return None
+        refresh_countdowns(lines, now, get_layout_config()['min_countdown'])
+    # Otherwise the RTC lost the time (power cycle, clock at the 2000 epoch)
+    # and the age is unknown. Intended: the snapshot is shown whatever its
+    # age, as saved and marked stale without an age, until the first fetch.
+
+    if not lines:
+        return None
+    _log.info('restored {} lines saved at {}', len(lines), saved_at)
+    return lines, saved_at
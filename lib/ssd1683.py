@@ -24,8 +24,14 @@ class SSD1683(FrameBuffer):
         self._w = width
         self._h = height
         self._buf = bytearray(width * height // 8)
+        self._mv = memoryview(self._buf)
         super().__init__(self._buf, width, height, MONO_HLSB)
 
+        # Command/data byte scratch, and SPI bytes sent by the last refresh
+        self._byte = bytearray(1)
+        self._sent = 0
+        self.bytes_sent = 0
+
         self._cs = Pin(cs, Pin.OUT)
         self._dc = Pin(dc, Pin.OUT)
         self._rst = Pin(rst, Pin.OUT)
@@ -40,17 +46,21 @@ class SSD1683(FrameBuffer):
 
     def _cmd(self, b):
         """Send command byte"""
+        self._byte[0] = b
         self._cs(0)
         self._dc(0)
-        self._spi.write(bytearray([b]))
+        self._spi.write(self._byte)
         self._cs(1)
+        self._sent += 1
 
     def _dat(self, b):
         """Send data byte"""
+        self._byte[0] = b
         self._cs(0)
         self._dc(1)
-        self._spi.write(bytearray([b]))
+        self._spi.write(self._byte)
         self._cs(1)
+        self._sent += 1
 
     def _wait(self):
         """Wait for display to be ready (BUSY pin low)"""
@@ -137,23 +147,71 @@ class SSD1683(FrameBuffer):
         self._dat(0x01)
         sleep_ms(100)
 
-    def show(self):
-        """Write framebuffer to display and do full refresh (flashes)"""
+    def _write_all(self):
+        """Write the whole framebuffer to display RAM"""
+        self._pos(0, 0, self._w - 1, self._h - 1)
+        self._cur(0, 0)
         self._cmd(0x24)  # Write RAM
         self._cs(0)
         self._dc(1)
         self._spi.write(self._buf)
         self._cs(1)
-        self._update()
-
-    def show_partial(self):
-        """Write framebuffer to display and do partial refresh (minimal flashing)"""
+        self._sent += len(self._buf)
+
+    def _write_region(self, x, y, w, h):
+        """
+        Write a rectangle of the framebuffer to display RAM, widened to whole
+        bytes (8 pixel columns). Display RAM outside it keeps its content.
+        """
+        x1 = max(0, x) & ~7
+        x2 = (min(self._w, x + w) - 1) | 7
+        y1 = max(0, y)
+        y2 = min(self._h, y + h) - 1
+        if x2 < x1 or y2 < y1:
+            return
+
+        stride = self._w // 8
+        first = x1 >> 3
+        last = (x2 >> 3) + 1
+        self._pos(x1, y1, x2, y2)
+        self._cur(first, y1)
         self._cmd(0x24)  # Write RAM
         self._cs(0)
         self._dc(1)
-        self._spi.write(self._buf)
+        mv = self._mv
+        if first == 0 and last == stride:
+            # Full-width band: rows are contiguous in the framebuffer
+            self._spi.write(mv[y1 * stride:(y2 + 1) * stride])
+        else:
+            for row in range(y1 * stride, (y2 + 1) * stride, stride):
+                self._spi.write(mv[row + first:row + last])
         self._cs(1)
+        self._sent += (last - first) * (y2 - y1 + 1)
+
+    def show(self):
+        """Write framebuffer to display and do full refresh (flashes)"""
+        self._sent = 0
+        self._write_all()
+        self._update()
+        self.bytes_sent = self._sent
+
+    def show_partial(self, regions=None):
+        """
+        Write framebuffer to display and do partial refresh (minimal flashing).
+
+        Args:
+            regions: Optional list of (x, y, w, h) rectangles that changed
+                since the last refresh; only these are sent over SPI.
+                None sends the whole framebuffer.
+        """
+        self._sent = 0
+        if regions is None:
+            self._write_all()
+        else:
+            for x, y, w, h in regions:
+                self._write_region(x, y, w, h)
         self._update_partial()
+        self.bytes_sent = self._sent
 
     @property
     def width(self):
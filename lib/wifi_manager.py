@@ -6,6 +6,9 @@ Provides a class-based API for Wi-Fi operations with watchdog integration.
 import network
 import utime
 from machine import idle
+from lib import log
+
+_log = log.get_logger('wifi')
 
 
 class WLANManager:
@@ -34,7 +37,7 @@ class WLANManager:
         Returns:
             True if connected successfully, False on timeout.
         """
-        print('Connecting to Wi-Fi:', self.ssid)
+        _log.info('Connecting to Wi-Fi: {}', self.ssid)
 
         # Reset interface for clean state
         self.wlan.active(False)
@@ -43,7 +46,7 @@ class WLANManager:
 
         # Check if already connected
         if self.wlan.isconnected():
-            print('Already connected, IP:', self.wlan.ifconfig()[0])
+            _log.info('Already connected, IP: {}', self.wlan.ifconfig()[0])
             return True
 
         # Initiate connection
@@ -51,17 +54,20 @@ class WLANManager:
 
         # Wait for connection with timeout
         start = utime.time()
+        logged = -1
         while not self.wlan.isconnected():
             if utime.time() - start > self.timeout:
-                print('Wi-Fi connection timeout')
+                _log.error('Wi-Fi connection timeout')
                 return False
             if self.wdt:
                 self.wdt.feed()
             elapsed = int(utime.time() - start)
-            print('Waiting for connection... {}s'.format(elapsed), end='\r')
+            if elapsed != logged:
+                _log.debug('Waiting for connection... {}s', elapsed)
+                logged = elapsed
             idle()
 
-        print('Connected! IP:', self.wlan.ifconfig()[0])
+        _log.info('Connected! IP: {}', self.wlan.ifconfig()[0])
         return True
 
     def disconnect(self):
@@ -90,7 +96,7 @@ class WLANManager:
         Returns:
             True if reconnected successfully, False otherwise.
         """
-        print('Reconnecting to Wi-Fi...')
+        _log.info('Reconnecting to Wi-Fi...')
         self.disconnect()
         utime.sleep(delay)
         return self.connect()
@@ -0,0 +1,160 @@
+"""
+Compact binary format for departure data.
+
+Layout (little-endian, version 1):
+    header      "WLD" magic, u8 version, u32 reference time,
+                u16 timestamp string index, u16 string count, u16 line count
+    strings     per string: u8 length + UTF-8 bytes (cut to 255 bytes at a
+                character boundary)
+    lines       per line: u16 stop, u16 diva, u16 name, u16 direction,
+                u16 towards (string indices), u8 departure count,
+                then per departure: i16 countdown, i32 time offset in seconds
+                from the reference time
+
+Strings are stored once, so repeated stop, line and destination names cost
+two bytes per use. The decoder reads the records straight out of a
+memoryview; only the string table entries are copied (and interned in
+departures.shared_strings).
+"""
+
+import struct
+from array import array
+from lib.departures import LineDepartures, anchor_departures, shared_strings
+
+MAGIC = b'WLD'
+VERSION = 1
+
+# Content type used by the LAN proxy for this format
+CONTENT_TYPE = 'application/vnd.wl-departures'
+
+_HEADER = '<3sBIHHH'
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_LINE = '<HHHHHB'
+_LINE_SIZE = struct.calcsize(_LINE)
+_DEPARTURE = '<hi'
+_DEPARTURE_SIZE = struct.calcsize(_DEPARTURE)
+
+# Longest string in the table, in bytes
+_MAX_STRING = 255
+
+
+def _encode_string(value):
+    """UTF-8 encode a string, cut to _MAX_STRING bytes without splitting a character."""
+    encoded = value.encode()
+    if len(encoded) <= _MAX_STRING:
+        return encoded
+    end = _MAX_STRING
+    # Step back over continuation bytes (0b10xxxxxx) to a character start
+    while encoded[end] & 0xC0 == 0x80:
+        end -= 1
+    return encoded[:end]
+
+
+def encode(lines, reference_time, locale_timestamp=''):
+    """
+    Encode departure records.
+
+    Args:
+        lines: List of LineDepartures with times on the encoder's clock
+        reference_time: Current time on the same clock (becomes the
+            decoder's serverTime)
+        locale_timestamp: Timestamp string passed through to the decoder
+
+    Returns:
+        bytes
+    """
+    strings = []
+    index = {}
+
+    def string_id(value):
+        i = index.get(value)
+        if i is None:
+            i = len(strings)
+            index[value] = i
+            strings.append(value)
+        return i
+
+    timestamp_id = string_id(locale_timestamp)
+    records = []
+    for line in lines:
+        count = min(len(line.countdowns), 255)
+        records.append(struct.pack(
+            _LINE,
+            string_id(line.stop), string_id(line.diva), string_id(line.name),
+            string_id(line.direction), string_id(line.towards), count,
+        ))
+        for i in range(count):
+            records.append(struct.pack(
+                _DEPARTURE, line.countdowns[i], line.times[i] - reference_time))
+
+    parts = [struct.pack(_HEADER, MAGIC, VERSION, reference_time,
+                         timestamp_id, len(strings), len(lines))]
+    for value in strings:
+        encoded = _encode_string(value)
+        parts.append(bytes((len(encoded),)))
+        parts.append(encoded)
+    parts.extend(records)
+    return b''.join(parts)
+
+
+def reference_time(buf):
+    """Return the reference time stored in an encoded dataset."""
+    if len(buf) < _HEADER_SIZE:
+        raise ValueError('Truncated departure payload')
+    header = struct.unpack_from(_HEADER, buf, 0)
+    if header[0] != MAGIC:
+        raise ValueError('Not a departure payload')
+    return header[2]
+
+
+def decode(buf, now):
+    """
+    Decode departure records from a buffer.
+
+    Args:
+        buf: bytes, bytearray or memoryview holding one encoded dataset
+        now: Local time (utime.time()) the data was received at
+
+    Returns:
+        {"data": [LineDepartures], "localeTimestamp": str}, like
+        get_data.transform_response()
+    """
+    mv = memoryview(buf)
+    magic, version, reference_time, timestamp_id, string_count, line_count = \
+        struct.unpack_from(_HEADER, mv, 0)
+    if magic != MAGIC:
+        raise ValueError('Not a departure payload')
+    if version != VERSION:
+        raise ValueError('Unsupported departure payload version {}'.format(version))
+
+    offset = _HEADER_SIZE
+    strings = []
+    for _ in range(string_count):
+        length = mv[offset]
+        offset += 1
+        strings.append(shared_strings.intern(str(bytes(mv[offset:offset + length]), 'utf-8')))
+        offset += length
+
+    lines = []
+    for _ in range(line_count):
+        stop, diva, name, direction, towards, count = struct.unpack_from(_LINE, mv, offset)
+        offset += _LINE_SIZE
+
+        countdowns = array('h')
+        times = array('l')
+        for _ in range(count):
+            countdown, delta = struct.unpack_from(_DEPARTURE, mv, offset)
+            offset += _DEPARTURE_SIZE
+            countdowns.append(countdown)
+            times.append(reference_time + delta)
+
+        lines.append(LineDepartures(
+            strings[stop], strings[diva], strings[name], strings[direction],
+            strings[towards], countdowns, times,
+        ))
+
+    anchor_departures(lines, reference_time, now)
+    return {
+        'data': lines,
+        'localeTimestamp': strings[timestamp_id],
+    }
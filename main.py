@@ -6,41 +6,96 @@ import utime
 import machine
 from machine import WDT
 
-from lib.config import get_update_interval, get_animation_interval, get_wlan_config, get_watchdog_timeout, get_stale_restart_threshold
+from lib.config import (
+    get_update_interval, get_animation_interval, get_wlan_config, get_watchdog_timeout,
+    get_stale_restart_threshold, get_fetch_interval_limits, get_log_config, get_retry_config,
+    get_heap_sample_interval
+)
 from lib.crowpanel import CrowPanel
 from lib.wifi_manager import WLANManager
 from lib.secrets import get_wifi_secrets
 from lib.display import (
     init_display, write_error_to_display, write_start_msg_to_display,
     write_to_display, update_current_time, update_arriving_animation,
-    clear_cached_departures, draw_wifi_status
+    draw_wifi_status, get_refresh_stats, clear_cached_departures
 )
-from lib.get_data import get_data
+from lib.get_data import get_data, close_connection, reserve_buffers
+from lib.metrics import fetch_samples
+from lib.departures import shared_strings
+from lib.scheduler import FetchScheduler
+from lib.retry import RetryPolicy, OPEN
 from lib.init_wifi import sync_time
+from lib import snapshot
+from lib import log, memory
+
+_log = log.get_logger('main')
 
 # Global instances
 panel = None
 wlan = None
 wdt = None
 
+# (lines, saved_at) of the last-good dataset shown at boot, or None
+restored = None
+
+
+def setup_logging():
+    """Apply the log level and sinks from config.json."""
+    log_config = get_log_config()
+    log.configure(
+        level=log.LEVELS[log_config['level']],
+        ring_lines=log_config['ring_lines'],
+        flash_path=log_config['flash_path'],
+        flash_max_bytes=log_config['flash_max_bytes'],
+        flash_backups=log_config['flash_backups'],
+        flash_level=log.LEVELS[log_config['flash_level']],
+    )
+
+
+def restore_snapshot():
+    """Show the last-good dataset from flash while the network comes up."""
+    global restored
+    restored = snapshot.load(utime.time())
+    if restored is None:
+        return
+    lines, saved_at = restored
+    write_to_display(lines, saved_at)
+    draw_wifi_status(False, True)
+
+
+def boot_message(msg):
+    """Show a boot screen message, unless restored departures are shown."""
+    if restored is None:
+        write_start_msg_to_display(msg)
+
 
 def initialize():
     """Initialize hardware, display, and Wi-Fi connection."""
     global panel, wlan, wdt
 
+    setup_logging()
+
     # Initialize watchdog timer
     wdt = WDT(timeout=get_watchdog_timeout())
     wdt.feed()
 
+    # Reserve the fetch buffers before the heap fragments, then take a
+    # baseline heap sample
+    reserve_buffers()
+    memory.sample_heap()
+
     # Initialize hardware abstraction
     panel = CrowPanel()
 
     # Initialize display
-    print('Initializing display...')
+    _log.info('Initializing display...')
     init_display()
     wdt.feed()
 
-    write_start_msg_to_display('Connecting to Wi-Fi...')
+    restore_snapshot()
+    wdt.feed()
+
+    boot_message('Connecting to Wi-Fi...')
 
     # Initialize Wi-Fi manager
     secrets = get_wifi_secrets()
@@ -52,21 +107,26 @@ def initialize():
         wdt=wdt
     )
 
-    print('Connecting to Wi-Fi...')
+    _log.info('Connecting to Wi-Fi...')
     if not wlan.connect():
-        print('Wi-Fi connection failed')
+        _log.error('Wi-Fi connection failed')
         write_error_to_display('Wi-Fi connection failed')
         return False
 
-    print('Wi-Fi connected')
+    _log.info('Wi-Fi connected')
     wdt.feed()
 
     # Sync time via NTP
-    write_start_msg_to_display('Syncing time...')
+    boot_message('Syncing time...')
     sync_time()
     wdt.feed()
 
-    write_start_msg_to_display('Fetching data...')
+    # Without a valid clock the restored countdowns cannot be extrapolated,
+    # they stay on screen as they are until the first fetch
+    if restored is not None and utime.time() < restored[1]:
+        clear_cached_departures()
+
+    boot_message('Fetching data...')
     return True
 
 
@@ -76,13 +136,13 @@ def check_buttons():
 
     Returns:
         'refresh' if HOME button pressed (force data refresh)
-        'toggle_display' if EXIT button pressed
+        'dump_stats' if EXIT button pressed
         None if no button pressed
     """
     if panel.is_home_pressed():
         return 'refresh'
     if panel.is_exit_pressed():
-        return 'toggle_display'
+        return 'dump_stats'
     return None
 
 
@@ -90,14 +150,23 @@ def start_main_loop():
     """Main polling loop for data fetching and display updates."""
     global wdt, wlan
 
-    last_data_fetch = 0
+    next_data_fetch = 0
     last_animation_toggle = 0
-    has_displayed_data = False
-    using_stale_data = False
-
-    DATA_REFRESH_INTERVAL = get_update_interval()
+    # The next fetch was forced with the HOME button
+    manual_refresh = False
+    last_heap_sample = utime.time()
+    # Restored departures count as displayed, stale data
+    has_displayed_data = restored is not None
+    using_stale_data = has_displayed_data
+    displayed_lines = restored[0] if restored is not None else None
+
+    min_interval, max_interval = get_fetch_interval_limits()
+    scheduler = FetchScheduler(get_update_interval(), min_interval, max_interval)
+    failure_threshold, open_sec, jitter = get_retry_config()
+    retry = RetryPolicy(min_interval, max_interval, failure_threshold, open_sec, jitter)
     ANIMATION_INTERVAL = get_animation_interval()
     STALE_RESTART_THRESHOLD = get_stale_restart_threshold()
+    HEAP_SAMPLE_INTERVAL = get_heap_sample_interval()
 
     while True:
         wdt.feed()
@@ -106,70 +175,110 @@ def start_main_loop():
         # Check for button input
         action = check_buttons()
         if action == 'refresh':
-            print('Manual refresh requested')
-            last_data_fetch = 0  # Force immediate refresh
+            _log.info('Manual refresh requested')
+            next_data_fetch = 0  # Force immediate refresh
+            manual_refresh = True
+            utime.sleep_ms(200)  # Debounce
+        elif action == 'dump_stats':
+            # Fetch latency samples with min/median/p95 over serial
+            fetch_samples.dump()
+            memory.dump()
+            print('display:', get_refresh_stats())
+            print('fetch intervals:', scheduler.reason_counts)
+            print('strings:', shared_strings.stats())
+            log.dump_ring()
             utime.sleep_ms(200)  # Debounce
 
         # Check Wi-Fi and reconnect if needed
         if not wlan.is_connected():
-            print('Wi-Fi disconnected, reconnecting...')
+            _log.warning('Wi-Fi disconnected, reconnecting...')
             wlan_config = get_wlan_config()
             if not wlan.reconnect(delay=wlan_config['reconnect_delay_sec']):
-                print('Reconnection failed')
+                _log.error('Reconnection failed')
                 using_stale_data = True
                 panel.led_on()
             else:
-                print('Reconnected successfully')
-
-        # Fetch new data at interval
-        if current_time - last_data_fetch >= DATA_REFRESH_INTERVAL:
+                _log.info('Reconnected successfully')
+                # Old socket belongs to the previous interface session,
+                # the cached TLS session is kept for resumption
+                close_connection()
+
+        # Fetch new data when the scheduler (or, after failures, the retry
+        # policy) says so
+        if current_time >= next_data_fetch:
             wdt.feed()
-            print('Fetching data...')
-
-            # Clear cached data to free memory before HTTP request
-            clear_cached_departures()
+            _log.info('Fetching data...')
 
             data = None
+            forced = manual_refresh
+            manual_refresh = False
             try:
                 data = get_data()
                 wdt.feed()
             except Exception as e:
-                print('Error fetching data:', e)
+                _log.exception('Error fetching data', e)
 
             if data is None:
-                print('Error: No data returned')
+                _log.error('No data returned')
                 # Only show error screen if we haven't displayed data yet
                 # Otherwise keep showing last valid data (stale is better than error)
                 if not has_displayed_data:
                     write_error_to_display('Error fetching data')
                 using_stale_data = True
                 panel.led_on()
-                last_data_fetch = current_time
+                if forced and retry.state == OPEN:
+                    # Not the breaker's probe: the open circuit keeps its schedule
+                    next_data_fetch = retry.retry_at
+                    _log.warning('Manual refresh failed, circuit stays open (retry: {})', retry.describe())
+                else:
+                    interval = retry.record_failure()
+                    next_data_fetch = current_time + interval
+                    _log.warning('Next fetch in {}s (retry: {})', interval, retry.describe())
+                if has_displayed_data:
+                    draw_wifi_status(wlan.is_connected(), True, retry.state == OPEN)
                 utime.sleep(1)
                 continue
 
-            print('Writing to display...')
-            write_to_display(data['data'])
+            displayed_lines = data['data']
+            scheduler.record_success(displayed_lines)
+            retry.record_success()
+            using_stale_data = False
+
+            _log.debug('Writing to display...')
+            write_to_display(displayed_lines)
             draw_wifi_status(wlan.is_connected(), using_stale_data)
             wdt.feed()
 
+            # Last-good dataset for the next boot
+            snapshot.save(displayed_lines, current_time)
+
             has_displayed_data = True
-            using_stale_data = False
             panel.led_off()
-            last_data_fetch = current_time
             last_animation_toggle = current_time
 
-        # Check if stale for too long - trigger restart
-        if using_stale_data and (current_time - last_data_fetch) > STALE_RESTART_THRESHOLD:
-            print('Stale for {}s, restarting...'.format(current_time - last_data_fetch))
+            interval, reason = scheduler.next_interval(displayed_lines, current_time)
+            next_data_fetch = current_time + interval
+            _log.info('Next fetch in {}s ({})', interval, reason)
+
+        # Restart if fetches keep failing for too long and a circuit breaker
+        # probe has failed too (a restart may recover a wedged network stack)
+        failing_for = retry.failing_for()
+        if using_stale_data and retry.failed_probes and failing_for > STALE_RESTART_THRESHOLD:
+            _log.error('Stale for {}s ({}), restarting...', failing_for, retry.describe())
             machine.reset()
 
+        # Track heap fragmentation (between fetches, the probe allocates)
+        if HEAP_SAMPLE_INTERVAL and current_time - last_heap_sample >= HEAP_SAMPLE_INTERVAL:
+            memory.sample_heap()
+            last_heap_sample = current_time
+
         # Toggle arriving indicator animation at interval
         if has_displayed_data and current_time - last_animation_toggle >= ANIMATION_INTERVAL:
             update_arriving_animation()
             last_animation_toggle = current_time
         else:
-            # Update current time display (only refreshes if minute changed)
+            # Update current time display and extrapolated countdowns
+            # (only refreshes if minute changed)
             update_current_time()
 
         # Sleep for 1 second
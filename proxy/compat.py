@@ -0,0 +1,52 @@
+"""
+CPython compatibility for the device modules in lib/.
+Registers the MicroPython-only modules they import (ujson, utime) under their
+CPython equivalents, and a placeholder for ntptime. Import this before any
+lib module.
+"""
+
+import calendar
+import json
+import sys
+import time
+import types
+
+
+def _install_utime():
+    """Provide utime with UTC semantics like an NTP-synced device."""
+    utime = types.ModuleType('utime')
+    utime.time = lambda: int(time.time())
+    utime.sleep = time.sleep
+    utime.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    utime.mktime = lambda t: calendar.timegm(tuple(t[:6]) + (0, 0, 0))
+    utime.localtime = lambda secs=None: time.gmtime(secs)
+    utime.ticks_ms = lambda: int(time.monotonic() * 1000)
+    utime.ticks_us = lambda: int(time.monotonic() * 1000000)
+    utime.ticks_diff = lambda a, b: a - b
+    utime.ticks_add = lambda a, b: a + b
+    sys.modules['utime'] = utime
+
+
+def _install_ntptime():
+    """Provide ntptime for imports; the host clock is already synced."""
+    ntptime = types.ModuleType('ntptime')
+    ntptime.host = 'pool.ntp.org'
+
+    def settime():
+        raise OSError('ntptime is not available on the host')
+
+    ntptime.settime = settime
+    sys.modules['ntptime'] = ntptime
+
+
+if 'ujson' not in sys.modules:
+    try:
+        import ujson  # noqa: F401
+    except ImportError:
+        sys.modules['ujson'] = json
+
+if 'utime' not in sys.modules:
+    _install_utime()
+
+if 'ntptime' not in sys.modules:
+    _install_ntptime()
@@ -0,0 +1,120 @@
+"""
+Mock Wiener Linien monitor endpoint for testing the proxy on Linux.
+Answers /ogd_realtime/monitor?diva=... with synthetic departures for every
+requested DIVA, shaped like the real API. Responses are gzip-compressed when
+the client sends Accept-Encoding: gzip.
+
+Usage:
+    python -m proxy.mock_upstream --port 8081
+"""
+
+import argparse
+import gzip
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+MOCK_LINES = (
+    ('49', 'HÜTTELDORF, Bahnhof'),
+    ('N49', 'HÜTTELDORF'),
+    ('47A', 'UNTER ST. VEIT U'),
+    ('U4', 'HEILIGENSTADT'),
+    ('52', 'WESTBAHNHOF S U'),
+)
+
+DEPARTURES_PER_LINE = 6
+
+
+def _iso(timestamp):
+    """Format epoch seconds like the API does (UTC)."""
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime(timestamp))
+
+
+def build_monitor_response(divas, now=None):
+    """Build a monitor response with both directions of every mock line per DIVA."""
+    now = int(time.time()) if now is None else now
+    monitors = []
+    for diva in divas:
+        lines = []
+        for name, towards in MOCK_LINES:
+            for direction in ('H', 'R'):
+                offset = random.randint(0, 240)
+                departures = []
+                for i in range(DEPARTURES_PER_LINE):
+                    planned = now + offset + i * 300
+                    real = planned + random.randint(0, 90)
+                    departures.append({
+                        'departureTime': {
+                            'timePlanned': _iso(planned),
+                            'timeReal': _iso(real),
+                            'countdown': (real - now) // 60,
+                        },
+                        'vehicle': {
+                            'name': name, 'towards': towards, 'direction': direction,
+                            'barrierFree': True, 'realtimeSupported': True,
+                            'trafficjam': False, 'type': 'ptTram',
+                        },
+                    })
+                lines.append({
+                    'name': name, 'towards': towards, 'direction': direction,
+                    'platform': '1', 'barrierFree': True, 'realtimeSupported': True,
+                    'trafficjam': False, 'departures': {'departure': departures},
+                    'type': 'ptTram', 'lineId': 100,
+                })
+        monitors.append({
+            'locationStop': {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [16.3, 48.2]},
+                'properties': {'name': diva, 'title': 'Mock Stop ' + diva, 'type': 'stop'},
+            },
+            'lines': lines,
+            'attributes': {},
+        })
+
+    return {
+        'data': {'monitors': monitors},
+        'message': {'value': 'OK', 'messageCode': 1, 'serverTime': _iso(now)},
+    }
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    """Serves build_monitor_response() for the requested DIVAs."""
+
+    protocol_version = 'HTTP/1.1'
+    request_count = 0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != '/ogd_realtime/monitor':
+            self.send_error(404)
+            return
+
+        MockUpstreamHandler.request_count += 1
+        divas = parse_qs(url.query).get('diva', [])
+        body = json.dumps(build_monitor_response(divas), ensure_ascii=False).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Wiener Linien monitor API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), MockUpstreamHandler)
+    print('Mock upstream on http://{}:{}/ogd_realtime/monitor'.format(args.host, args.port))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
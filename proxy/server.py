@@ -0,0 +1,274 @@
+"""
+LAN aggregation proxy for several displays.
+
+Polls the Wiener Linien monitor API once for the union of all DIVAs that
+displays asked for recently, and serves each display only its own lines over
+plain HTTP. Responses keep the upstream JSON shape, so the device parser is
+the same; countdowns are extrapolated to the time of each request. Displays
+that accept lib/wire.CONTENT_TYPE get the compact binary format instead.
+
+Displays request the same path as upstream, with their line filters added:
+    GET /ogd_realtime/monitor?diva=60201438&line=60201438/N49/R&line=60201438/49/
+
+Usage (from the repository root):
+    python -m proxy.server --port 8080
+    python -m proxy.server --upstream http://127.0.0.1:8081/ogd_realtime/monitor
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from proxy import compat  # noqa: F401 - must be imported before lib modules
+from lib.config import compile_line_filters
+from lib.departures import refresh_countdowns
+from lib.get_data import API_BASE_URL, transform_response
+from lib import wire
+
+MONITOR_PATH = '/ogd_realtime/monitor'
+STATS_PATH = '/stats'
+
+
+def _iso(timestamp):
+    """Format epoch seconds in the API timestamp format (UTC)."""
+    return time.strftime('%Y-%m-%dT%H:%M:%S.000+0000', time.gmtime(timestamp))
+
+
+def parse_device_query(query):
+    """
+    Parse a device request query into a stops list.
+
+    Returns:
+        List of {"diva": ..., "lines": {line_name: [directions]}}, in the
+        format of config.json's "stops"
+    """
+    params = parse_qs(query, keep_blank_values=True)
+    stops = {diva: {} for diva in params.get('diva', [])}
+    for spec in params.get('line', []):
+        parts = spec.split('/')
+        if len(parts) != 3 or not parts[0] or not parts[1]:
+            raise ValueError('Invalid line filter: ' + spec)
+        diva, line_name, directions = parts
+        stops.setdefault(diva, {})[line_name] = list(directions)
+    return [{'diva': diva, 'lines': lines} for diva, lines in stops.items()]
+
+
+def encode_monitor_response(lines, now):
+    """Serialize LineDepartures records back into the upstream JSON shape."""
+    monitors = {}
+    for line in lines:
+        monitor = monitors.get(line.diva)
+        if monitor is None:
+            monitor = {
+                'locationStop': {'properties': {'name': line.diva, 'title': line.stop}},
+                'lines': [],
+            }
+            monitors[line.diva] = monitor
+        monitor['lines'].append({
+            'name': line.name,
+            'towards': line.towards,
+            'direction': line.direction,
+            'departures': {'departure': [
+                {'departureTime': {'timeReal': _iso(t), 'countdown': c}}
+                for t, c in zip(line.times, line.countdowns, strict=True)
+            ]},
+        })
+
+    return json.dumps({
+        'data': {'monitors': list(monitors.values())},
+        'message': {'value': 'OK', 'serverTime': _iso(now)},
+    }, ensure_ascii=False).encode()
+
+
+class UpstreamPoller:
+    """Polls upstream for the union of DIVAs requested by active displays."""
+
+    def __init__(self, upstream_url, poll_interval, device_ttl):
+        """
+        Args:
+            upstream_url: Monitor endpoint URL without query
+            poll_interval: Seconds between upstream requests
+            device_ttl: Forget a DIVA after this many seconds without requests
+        """
+        self.upstream_url = upstream_url
+        self.poll_interval = poll_interval
+        self.device_ttl = device_ttl
+
+        self._lock = threading.Lock()
+        self._last_seen = {}
+        self._polled_divas = frozenset()
+
+        # Latest upstream body, bumped version on every successful poll
+        self.body = None
+        self.version = 0
+        self.polled_at = 0
+
+        self.upstream_requests = 0
+        self.upstream_errors = 0
+
+    def active_divas(self, now):
+        """Return DIVAs requested within device_ttl, sorted."""
+        with self._lock:
+            for diva, seen in list(self._last_seen.items()):
+                if now - seen > self.device_ttl:
+                    del self._last_seen[diva]
+            return sorted(self._last_seen)
+
+    def register(self, divas):
+        """Record a device request; poll immediately if a DIVA is new."""
+        now = time.time()
+        with self._lock:
+            for diva in divas:
+                self._last_seen[diva] = now
+            missing = not set(divas) <= self._polled_divas
+        if missing or self.body is None:
+            self.poll()
+
+    def poll(self):
+        """Fetch the union of active DIVAs from upstream."""
+        divas = self.active_divas(time.time())
+        if not divas:
+            return
+        url = self.upstream_url + '?' + '&'.join('diva=' + diva for diva in divas)
+        self.upstream_requests += 1
+        try:
+            with urllib.request.urlopen(url, timeout=10) as response:
+                body = response.read()
+        except OSError as e:
+            self.upstream_errors += 1
+            print('proxy: upstream request failed:', e)
+            return
+
+        with self._lock:
+            self.body = body
+            self.version += 1
+            self.polled_at = time.time()
+            self._polled_divas = frozenset(divas)
+        print('proxy: polled {} DIVAs, {} bytes'.format(len(divas), len(body)))
+
+    def latest(self):
+        """Return (body, version, polled_at) of the latest successful poll."""
+        with self._lock:
+            return self.body, self.version, self.polled_at
+
+    def run(self):
+        """Poll forever (run in a daemon thread)."""
+        while True:
+            time.sleep(self.poll_interval)
+            self.poll()
+
+
+class DeviceViews:
+    """Per-device filtered datasets, re-parsed only when upstream data changed."""
+
+    def __init__(self, poller):
+        self.poller = poller
+        self._lock = threading.Lock()
+        self._views = {}  # query -> (version, lines)
+        self.parses = 0
+        self.served = 0
+
+    def render(self, query, binary=False):
+        """Return the response body for a device query (JSON or wire format)."""
+        stops = parse_device_query(query)
+        self.poller.register([stop['diva'] for stop in stops])
+
+        with self._lock:
+            body, version, polled_at = self.poller.latest()
+            if body is None:
+                raise OSError('No upstream data available')
+
+            cached = self._views.get(query)
+            if cached is None or cached[0] != version:
+                filters = compile_line_filters(stops)
+                # All departures: each display cuts them to its own layout.
+                # Anchored to the poll, the body may be up to poll_interval old
+                lines = transform_response(io.BytesIO(body), filters, departure_limit=0,
+                                           min_countdowns={}, received_at=int(polled_at))['data']
+                cached = (version, lines)
+                self._views[query] = cached
+                self.parses += 1
+
+            now = int(time.time())
+            lines = cached[1]
+            refresh_countdowns(lines, now)
+            self.served += 1
+            if binary:
+                return wire.encode(lines, now, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now)))
+            return encode_monitor_response(lines, now)
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler for display requests."""
+
+    protocol_version = 'HTTP/1.1'
+    views = None
+
+    def _send(self, status, body, content_type='application/json'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == STATS_PATH:
+            poller = self.views.poller
+            stats = {
+                'upstream_requests': poller.upstream_requests,
+                'upstream_errors': poller.upstream_errors,
+                'upstream_version': poller.version,
+                'active_divas': poller.active_divas(time.time()),
+                'device_requests': self.views.served,
+                'parses': self.views.parses,
+            }
+            self._send(200, json.dumps(stats).encode())
+            return
+
+        if url.path != MONITOR_PATH:
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        binary = wire.CONTENT_TYPE in self.headers.get('Accept', '')
+        try:
+            body = self.views.render(url.query, binary)
+        except ValueError as e:
+            self._send(400, json.dumps({'error': str(e)}).encode())
+            return
+        except OSError as e:
+            self._send(502, json.dumps({'error': str(e)}).encode())
+            return
+        self._send(200, body, wire.CONTENT_TYPE if binary else 'application/json')
+
+
+def create_server(host, port, upstream_url, poll_interval, device_ttl):
+    """Create the proxy server and start the upstream poller thread."""
+    poller = UpstreamPoller(upstream_url, poll_interval, device_ttl)
+    ProxyHandler.views = DeviceViews(poller)
+    threading.Thread(target=poller.run, daemon=True).start()
+    return ThreadingHTTPServer((host, port), ProxyHandler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wiener Linien LAN aggregation proxy')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--upstream', default=API_BASE_URL, help='Upstream monitor URL')
+    parser.add_argument('--poll-interval', type=int, default=30, help='Seconds between upstream polls')
+    parser.add_argument('--device-ttl', type=int, default=600,
+                        help='Stop polling a DIVA after this many seconds without device requests')
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.upstream, args.poll_interval, args.device_ttl)
+    print('Proxy listening on http://{}:{}{}'.format(args.host, args.port, MONITOR_PATH))
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
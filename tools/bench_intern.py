@@ -0,0 +1,114 @@
+"""
+Benchmark: per-fetch string tables vs. the shared intern table.
+
+Runs several fetch cycles over the same fixture. Each cycle parses the
+response and shortens every destination once, like the display does for a
+redraw. 'per-fetch' reproduces the previous behaviour: a fresh intern table
+per response and an uncached shortening per row. 'shared' is the current
+one: departures.shared_strings persists across cycles and stores the
+shortened destinations.
+
+Allocations per cycle:
+
+    parsed       strings the tokenizer decodes (JsonStream.read_string()
+                 calls, each a bytearray and a str). Interning does not
+                 avoid these: a string is decoded before it is looked up.
+    peak KB      peak of the memory traced by tracemalloc during the cycle,
+                 above what was allocated before it
+    new strings  string objects held by the cycle's records and shortened
+                 destinations that are not the objects of the previous
+                 cycle, i.e. the allocations that outlive the parse and
+                 turn into garbage at the next fetch
+    shortenings  shorten_destination() calls
+
+Usage (from the repository root):
+    python -m tools.bench_intern
+"""
+
+import io
+import time
+import tracemalloc
+
+from tools.fixtures import make_fixture
+from lib import get_data
+from lib.config import get_destination_shortnames
+from lib.departures import InternTable, shared_strings, shorten_destination
+from lib.json_stream import JsonStream
+
+STOP_COUNTS = (3, 20)
+CYCLES = 20
+
+_calls = [0]
+_parsed = [0]
+
+_read_string = JsonStream.read_string
+
+
+def _counted_read_string(js):
+    _parsed[0] += 1
+    return _read_string(js)
+
+
+def _shorten(towards):
+    _calls[0] += 1
+    return shorten_destination(towards, get_destination_shortnames())
+
+
+def _per_fetch(raw, filters):
+    get_data.shared_strings = InternTable()
+    lines = get_data.transform_response(io.BytesIO(raw), filters)['data']
+    return lines, [_shorten(line.towards) for line in lines]
+
+
+def _shared(raw, filters):
+    get_data.shared_strings = shared_strings
+    lines = get_data.transform_response(io.BytesIO(raw), filters)['data']
+    return lines, [shared_strings.derived(line.towards, _shorten) for line in lines]
+
+
+def _strings(lines, shortened):
+    """ids of the string objects a cycle keeps."""
+    ids = set(id(value) for value in shortened)
+    for line in lines:
+        for value in (line.stop, line.diva, line.name, line.direction, line.towards):
+            ids.add(id(value))
+    return ids
+
+
+def main():
+    JsonStream.read_string = _counted_read_string
+    print('{:>6} {:>9} {:>8} {:>8} {:>12} {:>12} {:>10}'.format(
+        'stops', 'tables', 'parsed', 'peak KB', 'new strings', 'shortenings', 'ms/cycle'))
+    for stop_count in STOP_COUNTS:
+        raw, filters = make_fixture(stop_count)
+        for name, cycle in (('per-fetch', _per_fetch), ('shared', _shared)):
+            # Warm-up cycle: the first fetch allocates in both cases
+            previous = cycle(raw, filters)
+            new_strings = 0
+            _calls[0] = 0
+            _parsed[0] = 0
+            start = time.perf_counter()
+            for _ in range(CYCLES):
+                current = cycle(raw, filters)
+                # The previous cycle's records are alive while ids are compared
+                new_strings += len(_strings(*current) - _strings(*previous))
+                previous = current
+            elapsed = (time.perf_counter() - start) / CYCLES * 1000
+
+            # Traced separately, tracemalloc slows the timed cycles down
+            peak = 0
+            tracemalloc.start()
+            for _ in range(CYCLES):
+                base = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                previous = cycle(raw, filters)
+                peak += tracemalloc.get_traced_memory()[1] - base
+            tracemalloc.stop()
+
+            print('{:>6} {:>9} {:>8} {:>8.1f} {:>12} {:>12} {:>10.2f}'.format(
+                stop_count, name, _parsed[0] // (2 * CYCLES), peak / CYCLES / 1024,
+                new_strings // CYCLES, _calls[0] // (2 * CYCLES), elapsed))
+
+
+if __name__ == '__main__':
+    main()
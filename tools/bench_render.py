@@ -0,0 +1,151 @@
+"""
+Benchmark: render time per display update type.
+
+Draws on a host panel that records nothing, so the times are the Python
+side of an update: layout, font rendering and dirty tracking, without the
+SPI transfer and the panel refresh. Each update type is timed as
+write_to_display and the status helpers run it in the main loop:
+
+    layout           layout plan only (sort, group, positions)
+    new dataset      layout plan + full repaint
+    countdowns       time slots and status row of the dataset on screen
+    clock tick       bottom row only
+    animation frame  arriving indicators only
+    status           stale and Wi-Fi indicators
+
+'relayout' is the countdown redraw with the plan rebuilt every time, as
+before the layout plan: a full repaint. Font rendering dominates a
+repaint on the host; 'layout' is what the plan saves on each redraw of
+the same dataset and on every clock tick, animation frame and status
+update, which paint from it without touching the layout.
+
+Usage (from the repository root):
+    python -m tools.bench_render
+"""
+
+import io
+import time
+
+from tools.fixtures import make_fixture
+from lib import display, log
+from lib.get_data import transform_response
+
+STOP_COUNTS = (3, 20)
+ROUNDS = 50
+
+
+class HostPanel:
+    """Display driver stand-in with the drawing calls display.py uses."""
+
+    bytes_sent = 0
+
+    def init(self):
+        pass
+
+    def fill(self, color):
+        pass
+
+    def fill_rect(self, x, y, w, h, color):
+        pass
+
+    def hline(self, x, y, w, color):
+        pass
+
+    def vline(self, x, y, h, color):
+        pass
+
+    def rect(self, x, y, w, h, color):
+        pass
+
+    def pixel(self, x, y, color):
+        pass
+
+    def text(self, s, x, y, color):
+        pass
+
+    def show(self):
+        pass
+
+    def show_partial(self, regions=None):
+        pass
+
+
+def _dataset(raw, filters):
+    """Parse a fixture and move its departure times onto the host clock."""
+    lines = transform_response(io.BytesIO(raw), filters)['data']
+    now = int(time.time())
+    for line in lines:
+        countdowns = line.countdowns
+        for i in range(len(countdowns)):
+            # Mid-minute, so the countdowns hold while the benchmark runs
+            line.times[i] = now + countdowns[i] * 60 + 30
+    # One arriving departure, so the animation has a slot to toggle
+    lines[0].times[0] = now + 30
+    lines[0].countdowns[0] = 0
+    return lines
+
+
+def _layout(lines):
+    display._build_plan(display._cached_departures)
+
+
+def _new_dataset(lines):
+    # A fresh list is a new dataset to write_to_display
+    display._shown_fingerprint = None
+    display.write_to_display(list(lines))
+
+
+def _countdowns(lines):
+    display._shown_fingerprint = None
+    display.write_to_display(display._cached_departures)
+
+
+def _relayout(lines):
+    display._planned_data = None
+    _countdowns(lines)
+
+
+def _clock_tick(lines):
+    display._last_displayed_minute = -1
+    display.update_current_time()
+
+
+def _animation_frame(lines):
+    display.update_arriving_animation()
+
+
+def _status(lines):
+    display.draw_wifi_status(not display._wifi_connected)
+
+
+UPDATES = (
+    ('layout', _layout),
+    ('new dataset', _new_dataset),
+    ('countdowns', _countdowns),
+    ('relayout', _relayout),
+    ('clock tick', _clock_tick),
+    ('animation frame', _animation_frame),
+    ('status', _status),
+)
+
+
+def main():
+    # Keep the periodic full-refresh messages out of the table
+    log.configure(log.WARNING)
+    display.init_display(HostPanel())
+    print('{:>6} {:>6} {:>16} {:>10}'.format('stops', 'rows', 'update', 'ms/update'))
+    for stop_count in STOP_COUNTS:
+        raw, filters = make_fixture(stop_count)
+        lines = _dataset(raw, filters)
+        display.write_to_display(lines)
+        for name, update in UPDATES:
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                update(lines)
+            elapsed = (time.perf_counter() - start) / ROUNDS * 1000
+            print('{:>6} {:>6} {:>16} {:>10.3f}'.format(
+                stop_count, len(display._plan_rows), name, elapsed))
+
+
+if __name__ == '__main__':
+    main()
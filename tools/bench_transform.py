@@ -0,0 +1,77 @@
+"""
+Benchmark: cost of the record walks removed by validating while parsing.
+
+Before, every fetch ran the stream transform and then walked the records
+twice more: validate_response() and the always-on departure dump.
+Validation now happens inside the transform, and the dump only runs when
+the log level is debug (log.enabled(log.DEBUG)).
+
+The old transform itself is gone, so the two pipelines are not timed
+end to end. Instead each round parses the fixture with the current
+transform ('parse'), then times the removed walks on its records
+('removed walks'). 'passes' counts the walks over the record list after
+the parse: anchoring the departure times, plus validation and the dump
+in the old pipeline.
+
+Usage (from the repository root):
+    python -m tools.bench_transform
+"""
+
+import io
+import time
+from array import array
+from contextlib import redirect_stdout
+
+from tools.fixtures import make_fixture
+from lib import get_data
+from lib.departures import LineDepartures
+
+STOP_COUNTS = (20, 50)
+ROUNDS = 50
+
+# Walks over the record list after the parse: anchoring, validation, dump
+PASSES_BEFORE = 3
+PASSES_NOW = 1
+
+
+def _legacy_validate(lines):
+    """Record walk of the removed validate_response()."""
+    for line in lines:
+        if not isinstance(line, LineDepartures) or not line.name:
+            return False
+        if not isinstance(line.countdowns, array):
+            return False
+    return True
+
+
+def _dump(lines):
+    """The removed always-on departure dump."""
+    print('--- Start Output ---\n')
+    for line in lines:
+        countdowns = [str(countdown) for countdown in line.countdowns]
+        print('{}: {}'.format(line.name, ', '.join(countdowns)))
+    print('\n--- End Output ---\n')
+
+
+def main():
+    print('{:>6} {:>8} {:>10} {:>14} {:>7}'.format(
+        'stops', 'records', 'parse ms', 'removed walks', 'passes'))
+    for stop_count in STOP_COUNTS:
+        raw, filters = make_fixture(stop_count)
+        parse = walks = 0.0
+        with redirect_stdout(io.StringIO()):
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                lines = get_data.transform_response(io.BytesIO(raw), filters)['data']
+                parsed = time.perf_counter()
+                _legacy_validate(lines)
+                _dump(lines)
+                parse += parsed - start
+                walks += time.perf_counter() - parsed
+        print('{:>6} {:>8} {:>10.2f} {:>11.3f} ms {:>3} -> {}'.format(
+            stop_count, len(lines), parse / ROUNDS * 1000, walks / ROUNDS * 1000,
+            PASSES_BEFORE, PASSES_NOW))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: binary wire format vs. JSON for the same departure data.
+
+Encodes the filtered departures of each fixture both as the proxy's JSON
+response and as lib/wire, then compares payload size, decode time and the
+heap retained by the decoded result.
+
+Usage (from the repository root):
+    python -m tools.bench_wire
+"""
+
+import io
+import json
+import time
+
+from tools.fixtures import FIXTURE_TIME, heap_probe, make_fixture
+from lib import wire
+from lib.get_data import transform_response
+from proxy.server import encode_monitor_response
+
+try:
+    import ujson
+except ImportError:
+    ujson = json
+
+STOP_COUNTS = (3, 20)
+ROUNDS = 50
+
+
+def _time_per_call(func):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def _retained(func):
+    start, stop = heap_probe()
+    start()
+    result = func()
+    size = stop()
+    del result
+    return size
+
+
+def main():
+    print('{:>6} {:>8} {:>10} {:>10} {:>10}'.format('stops', 'format', 'bytes', 'ms/decode', 'heap'))
+    for stop_count in STOP_COUNTS:
+        raw, filters = make_fixture(stop_count)
+        lines = transform_response(io.BytesIO(raw), filters)['data']
+
+        json_payload = encode_monitor_response(lines, FIXTURE_TIME)
+        wire_payload = wire.encode(lines, FIXTURE_TIME, '2025-12-16 09:25:00')
+
+        cases = (
+            ('ujson', json_payload, lambda p=json_payload: ujson.loads(p)),
+            ('stream', json_payload, lambda p=json_payload, f=filters: transform_response(io.BytesIO(p), f)),
+            ('wire', wire_payload, lambda p=wire_payload: wire.decode(memoryview(p), FIXTURE_TIME)),
+        )
+        for name, payload, decode in cases:
+            print('{:>6} {:>8} {:>10} {:>10.3f} {:>10}'.format(
+                stop_count, name, len(payload), _time_per_call(decode), _retained(decode)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Synthetic API responses for the host benchmarks.
+"""
+
+import random
+
+from proxy import compat  # noqa: F401 - must be imported before lib modules
+from lib.config import compile_line_filters
+from proxy.mock_upstream import MOCK_LINES, build_monitor_response
+
+# Fixed clock so fixtures are reproducible
+FIXTURE_TIME = 1765877100  # 2025-12-16 09:25:00 UTC
+
+
+def make_fixture(stop_count, seed=1):
+    """
+    Build a monitor response for stop_count stops and a filter selecting every
+    mock line in one direction.
+
+    Returns:
+        (response_bytes, line_filters)
+    """
+    import json
+
+    random.seed(seed)
+    divas = [str(60200000 + i) for i in range(stop_count)]
+    body = json.dumps(build_monitor_response(divas, FIXTURE_TIME), ensure_ascii=False).encode()
+    stops = [{'diva': diva, 'lines': {name: ['R'] for name, _ in MOCK_LINES}} for diva in divas]
+    return body, compile_line_filters(stops)
+
+
+def heap_probe():
+    """
+    Return (start, stop) callables measuring bytes allocated in between.
+    Uses tracemalloc on CPython and gc.mem_alloc on MicroPython.
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        import gc
+
+        state = {}
+
+        def start():
+            gc.collect()
+            state['base'] = gc.mem_alloc()
+
+        def stop():
+            return gc.mem_alloc() - state['base']
+
+        return start, stop
+
+    def start():
+        tracemalloc.start()
+
+    def stop():
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return current
+
+    return start, stop